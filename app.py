@@ -3,12 +3,15 @@
 import logging
 import time
 from datetime import datetime
+from html import escape
 
+import numpy as np
 import pandas as pd
 import streamlit as st
-from streamlit_folium import st_folium
+import streamlit.components.v1 as components
 
 from src.scraper import (
+    expire_response_cache,
     fetch_weather_data,
     fetch_weekly_forecast,
     get_forecast_dates,
@@ -33,6 +36,177 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Sidebar legend markup, rendered as a single block
+_LEGEND_HTML = ''.join(
+    f'<div style="display:flex;align-items:center;margin:3px 0;">'
+    f'<span style="background:{color};width:18px;height:18px;'
+    f'display:inline-block;margin-right:8px;border-radius:50%;'
+    f'border:1px solid #ccc;"></span><span>{label}</span></div>'
+    for _, _, color, label in TEMPERATURE_COLORS
+)
+
+# Sidebar statistics markup, rendered as a single block
+_STAT_ITEM_HTML = (
+    '<div><div style="font-size:14px;color:#666;">{label}</div>'
+    '<div style="font-size:28px;line-height:1.3;">{value}</div>'
+    '<div style="font-size:13px;color:#999;">{note}</div></div>'
+)
+_STATS_HTML = (
+    '<div style="display:grid;grid-template-columns:1fr 1fr;gap:8px 16px;">'
+    + _STAT_ITEM_HTML.format(label="站數", value="{count}", note="")
+    + _STAT_ITEM_HTML.format(label="平均", value="{avg}", note="")
+    + _STAT_ITEM_HTML.format(label="🔥 最高", value="{max}", note="{max_location}")
+    + _STAT_ITEM_HTML.format(label="❄️ 最低", value="{min}", note="{min_location}")
+    + '</div>'
+)
+
+# Weekday labels indexed by datetime weekday (Monday = 0)
+_WEEKDAYS = np.array(["週一", "週二", "週三", "週四", "週五", "週六", "週日"])
+
+# Record fields drawn on the map (markers, popups, tooltips) and in statistics
+_RENDERED_FIELDS = (
+    'location_name', 'latitude', 'longitude', 'temperature',
+    'county_name', 'town_name', 'weather_description', 'humidity', 'wind_speed',
+    'observation_time', 'forecast_time'
+)
+
+
+# Cache windows (seconds) for CWA fetches. Disk-persisted caches ignore ttl,
+# so entries are keyed by the current window instead.
+REALTIME_CACHE_SECONDS = 600
+FORECAST_CACHE_SECONDS = 1800
+
+
+def _cache_window(seconds: int) -> int:
+    """Get the index of the current cache window."""
+    return int(time.time() // seconds)
+
+
+@st.cache_data(persist="disk", max_entries=2, show_spinner=False)
+def _cached_fetch_weather(window: int) -> list[dict]:
+    """Fetch real-time observations, shared across sessions and restarts."""
+    return fetch_weather_data()
+
+
+@st.cache_data(persist="disk", max_entries=2, show_spinner=False)
+def _cached_fetch_weekly_forecast(window: int) -> dict:
+    """Fetch weekly forecast, shared across sessions and restarts."""
+    return fetch_weekly_forecast()
+
+
+@st.cache_resource
+def get_db() -> WeatherDatabase:
+    """Get the weather database shared by all sessions."""
+    return WeatherDatabase("data/weather.db")
+
+
+def _data_key(data: list[dict]) -> int:
+    """Get a fingerprint of every rendered field of weather records for cache keys."""
+    return hash(tuple(tuple(r.get(f) for f in _RENDERED_FIELDS) for r in data))
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def _build_map_html(data_key: int, _data: list[dict]) -> str:
+    """Render a Folium map to HTML, reused while the data is unchanged.
+    
+    Only the rendered string is cached: a ``folium.Map`` is mutated by every
+    render, so sharing one object across reruns and sessions breaks it.
+    """
+    return create_folium_map(_data).get_root().render()
+
+
+def _forecast_key(forecast: dict) -> int:
+    """Get a cheap fingerprint of a forecast for cache keys."""
+    return hash(tuple(
+        (d, _data_key(get_forecast_by_date(forecast, d)))
+        for d in get_forecast_dates(forecast)
+    ))
+
+
+@st.cache_data(max_entries=2, show_spinner=False)
+def _build_forecast_maps(forecast_key: int, _forecast: dict) -> dict[str, str]:
+    """Render one Folium map to HTML per forecast time slot."""
+    return {
+        d: create_folium_map(get_forecast_by_date(_forecast, d)).get_root().render()
+        for d in get_forecast_dates(_forecast)
+    }
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _cached_statistics(data_key: int, _data: list[dict]) -> dict:
+    """Calculate statistics, reused while the data is unchanged."""
+    return calculate_statistics(_data)
+
+
+@st.cache_data(max_entries=2, show_spinner=False)
+def _build_forecast_df(forecast_key: int, _forecast: dict) -> pd.DataFrame:
+    """Flatten a forecast into one row per time slot and county."""
+    by_date = _forecast.get('by_date', {})
+    records = [
+        (date_key, r.get('location_name', ''), r.get('temperature'),
+         r.get('weather_description', ''), r.get('longitude'), r.get('latitude'))
+        for date_key in _forecast['dates']
+        for r in by_date.get(date_key, [])
+    ]
+    df = pd.DataFrame.from_records(
+        records,
+        columns=['時間', '縣市', '溫度(°C)', '天氣', '經度', '緯度']
+    )
+    return df.astype({'縣市': 'category', '天氣': 'category'})
+
+
+@st.cache_data(max_entries=2, show_spinner=False)
+def _build_forecast_pivot(forecast_key: int, _forecast: dict) -> pd.DataFrame:
+    """Build the county x time temperature table for a forecast."""
+    df = _build_forecast_df(forecast_key, _forecast)
+    pivot_df = (
+        df.groupby(['縣市', '時間'], observed=True)['溫度(°C)']
+        .first()
+        .unstack('時間')
+    )
+    # Rename columns to shorter format
+    pivot_df.columns = _format_forecast_times(pivot_df.columns)
+    return pivot_df
+
+
+def _format_forecast_times(times, date_format: str = '%m/%d') -> list[str]:
+    """Format forecast time keys as "<date> <weekday> <HH:MM>" labels.
+    
+    Args:
+        times: Iterable of "%Y-%m-%d %H:%M" time keys.
+        date_format: strftime format for the date part.
+        
+    Returns:
+        List of display labels; unparseable keys are returned unchanged.
+    """
+    times = pd.Index(times)
+    dt = pd.to_datetime(times, format="%Y-%m-%d %H:%M", errors='coerce')
+    labels = (
+        dt.strftime(date_format).fillna('') + ' '
+        + _WEEKDAYS[dt.weekday.fillna(0).astype(int)] + ' '
+        + dt.strftime('%H:%M').fillna('')
+    )
+    return np.where(dt.notna(), labels, times).tolist()
+
+
+def _format_temp(value) -> str:
+    """Format a temperature for display, or "N/A" if missing."""
+    return f"{value}°C" if value is not None else "N/A"
+
+
+def _temperature_bounds(temps: pd.Series) -> tuple[int, int]:
+    """Get integer slider bounds for a temperature column (0-40 if empty)."""
+    lo, hi = temps.min(), temps.max()
+    if pd.isna(lo):
+        return 0, 40
+    return int(lo), int(hi) + 1
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def _csv_bytes(df: pd.DataFrame) -> bytes:
+    """Encode a DataFrame as Excel-friendly UTF-8 CSV bytes."""
+    return df.to_csv(index=False).encode('utf-8-sig')
+
 
 def init_session_state():
     """Initialize session state variables."""
@@ -43,7 +217,7 @@ def init_session_state():
     if 'last_update' not in st.session_state:
         st.session_state.last_update = None
     if 'db' not in st.session_state:
-        st.session_state.db = WeatherDatabase("data/weather.db")
+        st.session_state.db = get_db()
     if 'view_mode' not in st.session_state:
         st.session_state.view_mode = "即時觀測"
     if 'selected_time' not in st.session_state:
@@ -58,8 +232,14 @@ def load_realtime_data(force_refresh: bool = False) -> list[dict]:
     """Load real-time weather data."""
     if force_refresh or st.session_state.weather_data is None:
         try:
+            if force_refresh:
+                _cached_fetch_weather.clear()
+                expire_response_cache()
             with st.spinner("正在取得即時觀測資料..."):
-                data = fetch_weather_data()
+                data = _cached_fetch_weather(_cache_window(REALTIME_CACHE_SECONDS))
+                if not data:
+                    # Don't keep an empty result around for the whole window
+                    _cached_fetch_weather.clear()
                 st.session_state.db.save_weather_data(data)
                 st.session_state.weather_data = data
                 st.session_state.last_update = datetime.now()
@@ -85,8 +265,14 @@ def load_forecast_data(force_refresh: bool = False) -> dict:
     """Load weekly forecast data."""
     if force_refresh or st.session_state.forecast_data is None:
         try:
+            if force_refresh:
+                _cached_fetch_weekly_forecast.clear()
+                expire_response_cache()
             with st.spinner("正在取得一週預報資料..."):
-                forecast = fetch_weekly_forecast()
+                forecast = _cached_fetch_weekly_forecast(_cache_window(FORECAST_CACHE_SECONDS))
+                if not get_forecast_dates(forecast):
+                    # Don't keep an empty result around for the whole window
+                    _cached_fetch_weekly_forecast.clear()
                 st.session_state.forecast_data = forecast
                 st.session_state.last_update = datetime.now()
                 
@@ -114,7 +300,8 @@ def render_sidebar():
         "選擇模式",
         ["即時觀測", "一週預報"],
         horizontal=True,
-        label_visibility="collapsed"
+        label_visibility="collapsed",
+        key="view_mode_radio"
     )
     
     if mode != st.session_state.view_mode:
@@ -125,7 +312,7 @@ def render_sidebar():
     st.sidebar.divider()
     
     # Refresh button
-    if st.sidebar.button("🔄 重新整理", use_container_width=True):
+    if st.sidebar.button("🔄 重新整理", use_container_width=True, key="refresh_btn"):
         if st.session_state.view_mode == "即時觀測":
             load_realtime_data(force_refresh=True)
         else:
@@ -138,6 +325,16 @@ def render_sidebar():
     return mode
 
 
+def _select_forecast_time(display_map: dict):
+    """Update the selected time from the dropdown selector."""
+    st.session_state.selected_time = display_map[st.session_state.fc_time_select]
+
+
+def _slide_forecast_time(dates: list[str]):
+    """Update the selected time from the timeline slider."""
+    st.session_state.selected_time = dates[st.session_state.fc_time_slider]
+
+
 def render_forecast_controls(forecast: dict):
     """Render forecast time selection controls."""
     dates = get_forecast_dates(forecast)
@@ -148,44 +345,35 @@ def render_forecast_controls(forecast: dict):
     st.sidebar.header("📅 預報時間")
     
     # Format display options
-    display_map = {}
-    for d in dates:
-        try:
-            dt = datetime.strptime(d, "%Y-%m-%d %H:%M")
-            weekdays = ["週一", "週二", "週三", "週四", "週五", "週六", "週日"]
-            display = f"{dt.strftime('%m/%d')} {weekdays[dt.weekday()]} {dt.strftime('%H:%M')}"
-            display_map[display] = d
-        except:
-            display_map[d] = d
-    
-    display_options = list(display_map.keys())
-    
-    # Find current index
-    current_idx = 0
-    for i, (disp, key) in enumerate(display_map.items()):
-        if key == st.session_state.selected_time:
-            current_idx = i
-            break
+    labels = _format_forecast_times(dates)
+    display_map = dict(zip(labels, dates))
+    
+    # Keep both widgets in sync with the selected time
+    date_to_idx = {d: i for i, d in enumerate(dates)}
+    current_idx = date_to_idx.get(st.session_state.selected_time, 0)
+    st.session_state.selected_time = dates[current_idx]
+    st.session_state.fc_time_select = labels[current_idx]
+    st.session_state.fc_time_slider = current_idx
     
     # Dropdown selector
-    selected_display = st.sidebar.selectbox(
+    st.sidebar.selectbox(
         "選擇時間",
-        options=display_options,
-        index=current_idx,
-        label_visibility="collapsed"
+        options=list(display_map.keys()),
+        label_visibility="collapsed",
+        key="fc_time_select",
+        on_change=_select_forecast_time,
+        args=(display_map,)
     )
-    st.session_state.selected_time = display_map[selected_display]
     
     # Slider
-    slider_val = st.sidebar.slider(
+    st.sidebar.slider(
         "時間軸",
         0, len(dates) - 1,
-        current_idx,
-        format=f"第 %d 時段"
+        format=f"第 %d 時段",
+        key="fc_time_slider",
+        on_change=_slide_forecast_time,
+        args=(dates,)
     )
-    if slider_val != current_idx:
-        st.session_state.selected_time = dates[slider_val]
-        st.rerun()
     
     st.sidebar.divider()
     
@@ -194,16 +382,18 @@ def render_forecast_controls(forecast: dict):
     col1, col2 = st.sidebar.columns(2)
     
     with col1:
-        if st.button("▶️ 播放", use_container_width=True):
+        if st.button("▶️ 播放", use_container_width=True, key="anim_play"):
             st.session_state.animation_running = True
+            st.session_state.anim_start = date_to_idx[st.session_state.selected_time]
+            st.session_state.anim_idx = st.session_state.anim_start
             st.rerun()
     
     with col2:
-        if st.button("⏹️ 停止", use_container_width=True):
+        if st.button("⏹️ 停止", use_container_width=True, key="anim_stop"):
             st.session_state.animation_running = False
             st.rerun()
     
-    speed = st.sidebar.slider("速度", 0.5, 2.0, 1.0, 0.5, format="%.1f秒")
+    speed = st.sidebar.slider("速度", 0.5, 2.0, 1.0, 0.5, format="%.1f秒", key="anim_speed")
     
     return st.session_state.selected_time, speed, dates
 
@@ -216,19 +406,19 @@ def render_statistics(data: list[dict]):
     st.sidebar.divider()
     st.sidebar.header("📊 統計")
     
-    stats = calculate_statistics(data)
-    
-    col1, col2 = st.sidebar.columns(2)
-    with col1:
-        st.metric("站數", stats['count'])
-    with col2:
-        if stats['avg_temp']:
-            st.metric("平均", f"{stats['avg_temp']}°C")
-    
-    if stats['max_temp']:
-        st.sidebar.metric("🔥 最高", f"{stats['max_temp']}°C", stats['max_location'], delta_color="off")
-    if stats['min_temp']:
-        st.sidebar.metric("❄️ 最低", f"{stats['min_temp']}°C", stats['min_location'], delta_color="off")
+    stats = _cached_statistics(_data_key(data), data)
+    
+    st.sidebar.markdown(
+        _STATS_HTML.format(
+            count=stats['count'],
+            avg=_format_temp(stats['avg_temp']),
+            max=_format_temp(stats['max_temp']),
+            max_location=escape(stats['max_location'] or ''),
+            min=_format_temp(stats['min_temp']),
+            min_location=escape(stats['min_location'] or '')
+        ),
+        unsafe_allow_html=True
+    )
 
 
 def render_legend():
@@ -236,43 +426,65 @@ def render_legend():
     st.sidebar.divider()
     st.sidebar.header("🎨 圖例")
     
-    for _, _, color, label in TEMPERATURE_COLORS:
-        st.sidebar.markdown(
-            f'<div style="display:flex;align-items:center;margin:3px 0;">'
-            f'<span style="background:{color};width:18px;height:18px;'
-            f'display:inline-block;margin-right:8px;border-radius:50%;'
-            f'border:1px solid #ccc;"></span><span>{label}</span></div>',
-            unsafe_allow_html=True
-        )
+    st.sidebar.markdown(_LEGEND_HTML, unsafe_allow_html=True)
 
 
 def render_map(data: list[dict], title: str = ""):
-    """Render the weather map."""
+    """Render the weather map.
+    
+    The map is a static HTML component: panning and zooming happen in the
+    browser and never trigger a rerun.
+    """
     if not data:
         st.warning("⚠️ 沒有資料")
         return
     
     try:
-        m = create_folium_map(data)
-        st_folium(m, width=None, height=600, returned_objects=[])
+        components.html(_build_map_html(_data_key(data), data), height=600)
     except Exception as e:
         st.error(f"❌ 地圖載入失敗: {e}")
 
 
+def render_temperature_table(df: pd.DataFrame, key: str):
+    """Render a data table with a formatted temperature column.
+    
+    The color gradient is opt-in: a Styler sends per-cell CSS to the browser.
+    """
+    data = df
+    if st.checkbox("🎨 顯示溫度色階", key=f"{key}_gradient"):
+        data = df.style.background_gradient(subset=['溫度(°C)'], cmap='RdYlBu_r')
+    st.dataframe(
+        data,
+        use_container_width=True,
+        height=500,
+        column_config={'溫度(°C)': st.column_config.NumberColumn(format="%.1f")}
+    )
+
+
 def render_realtime_table(data: list[dict]):
     """Render real-time data as filterable table."""
     if not data:
         st.warning("⚠️ 沒有資料")
         return
     
-    # Convert to DataFrame
-    df = pd.DataFrame(data)
+    # Convert to DataFrame with only the displayed columns
+    df_display = pd.DataFrame(data, columns=['location_name', 'county_name', 'town_name', 'temperature', 
+                                             'weather_description', 'humidity', 'wind_speed', 'observation_time'])
     
     # Rename columns for display
-    df_display = df[['location_name', 'county_name', 'town_name', 'temperature', 
-                     'weather_description', 'humidity', 'wind_speed', 'observation_time']].copy()
     df_display.columns = ['站名', '縣市', '鄉鎮', '溫度(°C)', '天氣', '濕度(%)', '風速(m/s)', '觀測時間']
     
+    # Repeated labels are much smaller and faster to filter as categoricals
+    for col in ('站名', '縣市', '鄉鎮', '天氣'):
+        df_display[col] = df_display[col].astype('category')
+    
+    # Format observation time
+    df_display['觀測時間'] = (
+        df_display['觀測時間'].fillna('')
+        .str.replace('T', ' ', regex=False)
+        .str.replace('+08:00', '', regex=False)
+    )
+    
     # Filters
     st.subheader("🔍 篩選條件")
     col1, col2, col3 = st.columns(3)
@@ -289,43 +501,31 @@ def render_realtime_table(data: list[dict]):
         selected_town = st.selectbox("選擇鄉鎮", towns, key="rt_town")
     
     with col3:
+        temp_lo, temp_hi = _temperature_bounds(df_display['溫度(°C)'])
         temp_range = st.slider(
             "溫度範圍 (°C)",
-            min_value=int(df_display['溫度(°C)'].min()) if not df_display['溫度(°C)'].isna().all() else 0,
-            max_value=int(df_display['溫度(°C)'].max()) + 1 if not df_display['溫度(°C)'].isna().all() else 40,
-            value=(int(df_display['溫度(°C)'].min()) if not df_display['溫度(°C)'].isna().all() else 0,
-                   int(df_display['溫度(°C)'].max()) + 1 if not df_display['溫度(°C)'].isna().all() else 40),
+            min_value=temp_lo,
+            max_value=temp_hi,
+            value=(temp_lo, temp_hi),
             key="rt_temp"
         )
     
-    # Apply filters
-    filtered_df = df_display.copy()
+    # Apply filters with a single mask
+    mask = df_display['溫度(°C)'].between(temp_range[0], temp_range[1])
     if selected_county != '全部':
-        filtered_df = filtered_df[filtered_df['縣市'] == selected_county]
+        mask &= df_display['縣市'] == selected_county
     if selected_town != '全部':
-        filtered_df = filtered_df[filtered_df['鄉鎮'] == selected_town]
-    filtered_df = filtered_df[
-        (filtered_df['溫度(°C)'] >= temp_range[0]) & 
-        (filtered_df['溫度(°C)'] <= temp_range[1])
-    ]
-    
-    # Format observation time
-    filtered_df['觀測時間'] = filtered_df['觀測時間'].apply(
-        lambda x: x.replace('T', ' ').replace('+08:00', '') if pd.notna(x) else ''
-    )
+        mask &= df_display['鄉鎮'] == selected_town
+    filtered_df = df_display.loc[mask]
     
     # Display stats
     st.caption(f"顯示 {len(filtered_df)} / {len(df_display)} 筆資料")
     
     # Display table with styling
-    st.dataframe(
-        filtered_df.style.background_gradient(subset=['溫度(°C)'], cmap='RdYlBu_r'),
-        use_container_width=True,
-        height=500
-    )
+    render_temperature_table(filtered_df, key="rt")
     
     # Download button
-    csv = filtered_df.to_csv(index=False).encode('utf-8-sig')
+    csv = _csv_bytes(filtered_df)
     st.download_button(
         "📥 下載 CSV",
         csv,
@@ -342,24 +542,12 @@ def render_forecast_table(forecast: dict):
         return
     
     # Build complete DataFrame from all dates
-    all_records = []
-    for date_key in forecast['dates']:
-        for record in forecast.get('by_date', {}).get(date_key, []):
-            all_records.append({
-                '時間': date_key,
-                '縣市': record.get('location_name', ''),
-                '溫度(°C)': record.get('temperature'),
-                '天氣': record.get('weather_description', ''),
-                '經度': record.get('longitude'),
-                '緯度': record.get('latitude')
-            })
-    
-    if not all_records:
+    df = _build_forecast_df(_forecast_key(forecast), forecast)
+    
+    if df.empty:
         st.warning("⚠️ 沒有資料")
         return
     
-    df = pd.DataFrame(all_records)
-    
     # Filters
     st.subheader("🔍 篩選條件")
     col1, col2, col3 = st.columns(3)
@@ -370,84 +558,52 @@ def render_forecast_table(forecast: dict):
     
     with col2:
         # Format time options for display
-        time_options = ['全部']
-        time_display_map = {'全部': '全部'}
-        for t in forecast['dates']:
-            try:
-                dt = datetime.strptime(t, "%Y-%m-%d %H:%M")
-                weekdays = ["週一", "週二", "週三", "週四", "週五", "週六", "週日"]
-                display = f"{dt.strftime('%m/%d')} {weekdays[dt.weekday()]} {dt.strftime('%H:%M')}"
-                time_options.append(display)
-                time_display_map[display] = t
-            except:
-                time_options.append(t)
-                time_display_map[t] = t
+        time_labels = _format_forecast_times(forecast['dates'])
+        time_options = ['全部'] + time_labels
+        time_display_map = {'全部': '全部', **dict(zip(time_labels, forecast['dates']))}
         
         selected_time_display = st.selectbox("選擇時間", time_options, key="fc_time")
         selected_time = time_display_map[selected_time_display]
     
     with col3:
-        temp_min = df['溫度(°C)'].min() if not df['溫度(°C)'].isna().all() else 0
-        temp_max = df['溫度(°C)'].max() if not df['溫度(°C)'].isna().all() else 40
+        temp_lo, temp_hi = _temperature_bounds(df['溫度(°C)'])
         temp_range = st.slider(
             "溫度範圍 (°C)",
-            min_value=int(temp_min),
-            max_value=int(temp_max) + 1,
-            value=(int(temp_min), int(temp_max) + 1),
+            min_value=temp_lo,
+            max_value=temp_hi,
+            value=(temp_lo, temp_hi),
             key="fc_temp"
         )
     
-    # Apply filters
-    filtered_df = df.copy()
+    # Apply filters with a single mask
+    mask = df['溫度(°C)'].between(temp_range[0], temp_range[1])
     if selected_county != '全部':
-        filtered_df = filtered_df[filtered_df['縣市'] == selected_county]
+        mask &= df['縣市'] == selected_county
     if selected_time != '全部':
-        filtered_df = filtered_df[filtered_df['時間'] == selected_time]
-    filtered_df = filtered_df[
-        (filtered_df['溫度(°C)'] >= temp_range[0]) & 
-        (filtered_df['溫度(°C)'] <= temp_range[1])
-    ]
+        mask &= df['時間'] == selected_time
+    filtered_df = df.loc[mask]
     
     # Format time for display
-    def format_time(t):
-        try:
-            dt = datetime.strptime(t, "%Y-%m-%d %H:%M")
-            weekdays = ["週一", "週二", "週三", "週四", "週五", "週六", "週日"]
-            return f"{dt.strftime('%m/%d')} {weekdays[dt.weekday()]} {dt.strftime('%H:%M')}"
-        except:
-            return t
-    
-    display_df = filtered_df.copy()
-    display_df['時間'] = display_df['時間'].apply(format_time)
-    display_df = display_df[['時間', '縣市', '溫度(°C)', '天氣']]
+    display_df = filtered_df[['時間', '縣市', '溫度(°C)', '天氣']].assign(
+        時間=_format_forecast_times(filtered_df['時間'])
+    )
     
     # Display stats
     st.caption(f"顯示 {len(filtered_df)} / {len(df)} 筆資料")
     
     # Display table
-    st.dataframe(
-        display_df.style.background_gradient(subset=['溫度(°C)'], cmap='RdYlBu_r'),
-        use_container_width=True,
-        height=500
-    )
+    render_temperature_table(display_df, key="fc")
     
     # Pivot table view
     with st.expander("📊 樞紐分析表 (縣市 × 時間)"):
-        pivot_df = df.pivot_table(
-            values='溫度(°C)', 
-            index='縣市', 
-            columns='時間', 
-            aggfunc='first'
-        )
-        # Rename columns to shorter format
-        pivot_df.columns = [format_time(c) for c in pivot_df.columns]
+        pivot_df = _build_forecast_pivot(_forecast_key(forecast), forecast)
         st.dataframe(
             pivot_df.style.background_gradient(cmap='RdYlBu_r', axis=None),
             use_container_width=True
         )
     
     # Download button
-    csv = filtered_df.to_csv(index=False).encode('utf-8-sig')
+    csv = _csv_bytes(filtered_df)
     st.download_button(
         "📥 下載 CSV",
         csv,
@@ -458,62 +614,48 @@ def render_forecast_table(forecast: dict):
 
 
 def run_animation(forecast: dict, speed: float, dates: list[str]):
-    """Run forecast animation."""
+    """Run forecast animation.
+    
+    Frames are drawn by a fragment that reruns every ``speed`` seconds, so
+    only the animation area updates while the rest of the page stays idle.
+    """
     if not dates:
         return
     
-    # Find starting index
-    start_idx = 0
-    if st.session_state.selected_time in dates:
-        start_idx = dates.index(st.session_state.selected_time)
+    maps = _build_forecast_maps(_forecast_key(forecast), forecast)
+    st.fragment(_render_animation_frame, run_every=speed)(forecast, dates, maps)
+
+
+def _render_animation_frame(forecast: dict, dates: list[str], maps: dict):
+    """Render the current animation frame and advance to the next one."""
+    if not st.session_state.animation_running:
+        return
     
-    # Placeholders
-    time_placeholder = st.empty()
-    stats_placeholder = st.empty()
-    map_placeholder = st.empty()
+    idx = st.session_state.get('anim_idx', 0) % len(dates)
+    current_time = dates[idx]
+    data = get_forecast_by_date(forecast, current_time)
     
-    idx = start_idx
+    # Display time
+    st.markdown(f"### 📅 {_format_forecast_times([current_time], '%Y/%m/%d')[0]}")
     
-    while st.session_state.animation_running:
-        current_time = dates[idx]
-        data = get_forecast_by_date(forecast, current_time)
-        
-        # Display time
-        try:
-            dt = datetime.strptime(current_time, "%Y-%m-%d %H:%M")
-            weekdays = ["週一", "週二", "週三", "週四", "週五", "週六", "週日"]
-            time_str = f"📅 {dt.strftime('%Y/%m/%d')} {weekdays[dt.weekday()]} {dt.strftime('%H:%M')}"
-        except:
-            time_str = current_time
-        
-        time_placeholder.markdown(f"### {time_str}")
-        
-        # Statistics
-        with stats_placeholder.container():
-            stats = calculate_statistics(data)
-            cols = st.columns(4)
-            cols[0].metric("縣市數", stats['count'])
-            cols[1].metric("平均", f"{stats['avg_temp']}°C" if stats['avg_temp'] else "N/A")
-            cols[2].metric("最高", f"{stats['max_temp']}°C" if stats['max_temp'] else "N/A")
-            cols[3].metric("最低", f"{stats['min_temp']}°C" if stats['min_temp'] else "N/A")
-        
-        # Map with unique key for each frame
-        with map_placeholder.container():
-            m = create_folium_map(data)
-            st_folium(m, width=None, height=500, returned_objects=[], key=f"map_animation_{idx}")
-        
-        st.session_state.selected_time = current_time
-        
-        idx = (idx + 1) % len(dates)
-        
-        # Check if we've completed the loop
-        if idx == start_idx:
-            st.session_state.animation_running = False
-            break
-        
-        time.sleep(speed)
+    # Statistics
+    stats = _cached_statistics(_data_key(data), data)
+    cols = st.columns(4)
+    cols[0].metric("縣市數", stats['count'])
+    cols[1].metric("平均", _format_temp(stats['avg_temp']))
+    cols[2].metric("最高", _format_temp(stats['max_temp']))
+    cols[3].metric("最低", _format_temp(stats['min_temp']))
+    
+    # Map
+    components.html(maps[current_time], height=500)
     
-    st.rerun()
+    st.session_state.selected_time = current_time
+    st.session_state.anim_idx = (idx + 1) % len(dates)
+    
+    # Stop once we've completed the loop and refresh the whole page
+    if st.session_state.anim_idx == st.session_state.get('anim_start', 0):
+        st.session_state.animation_running = False
+        st.rerun()
 
 
 def main():
@@ -565,12 +707,8 @@ def main():
         with tab1:
             # Display current time
             if st.session_state.selected_time:
-                try:
-                    dt = datetime.strptime(st.session_state.selected_time, "%Y-%m-%d %H:%M")
-                    weekdays = ["週一", "週二", "週三", "週四", "週五", "週六", "週日"]
-                    st.markdown(f"### 📅 {dt.strftime('%Y/%m/%d')} {weekdays[dt.weekday()]} {dt.strftime('%H:%M')}")
-                except:
-                    st.markdown(f"### 📅 {st.session_state.selected_time}")
+                time_label = _format_forecast_times([st.session_state.selected_time], '%Y/%m/%d')[0]
+                st.markdown(f"### 📅 {time_label}")
             
             # Handle animation or static display
             if st.session_state.animation_running and dates:
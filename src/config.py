@@ -2,6 +2,7 @@
 
 import os
 import logging
+from functools import lru_cache
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -9,14 +10,18 @@ from dotenv import load_dotenv
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Load .env file from project root
+# Load .env file from project root (skipped when the key is already set)
 env_path = Path(__file__).parent.parent / ".env"
-load_dotenv(dotenv_path=env_path)
+if not os.getenv("CWA_API_KEY"):
+    load_dotenv(dotenv_path=env_path)
 
 
+@lru_cache(maxsize=1)
 def get_cwa_api_key() -> str:
     """Get CWA API key from environment variables or Streamlit secrets.
     
+    The key is resolved once and cached for the lifetime of the process.
+    
     Returns:
         str: The CWA API key.
         
@@ -1,19 +1,39 @@
 """Weather data scraper for CWA OpenData API."""
 
+import io
 import logging
 import os
+import random
+import re
+import socket
 import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from datetime import datetime
-from typing import Optional
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Iterable, Iterator, Optional
 
 import requests
 import urllib3
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.util.request import ACCEPT_ENCODING
 
 from .config import CWA_API_BASE_URL, get_cwa_api_key
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Optional: stream-parse large responses instead of decoding them whole
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# Optional: faster whole-body decoding when streaming is unavailable
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
 # Disable SSL warnings for Streamlit Cloud
@@ -24,6 +44,87 @@ urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 STATION_OBSERVATION_ENDPOINT = "O-A0003-001"  # 即時觀測
 WEEKLY_FORECAST_ENDPOINT = "F-D0047-091"  # 一週縣市預報（含經緯度）
 
+# JSON paths (ijson prefix syntax) of the records we parse from each endpoint
+STATION_ITEMS_PREFIX = "records.Station.item"
+FORECAST_LOCATION_ITEMS_PREFIX = "records.Locations.item.Location.item"
+
+# Bytes of the opening chunk scanned per step when looking for the success flag
+_SUCCESS_SCAN_SIZE = 256
+
+# Bytes read from the response per stream-parsing step
+RESPONSE_CHUNK_SIZE = 64 * 1024
+
+# Raw values CWA uses for missing measurements
+_SENTINELS = frozenset({None, "", "-99", "-99.0", -99, -99.0})
+
+# WeatherElement names read from each forecast location
+_TEMP_ELEM = "平均溫度"
+_WX_ELEM = "天氣現象"
+
+# Fail fast on unreachable hosts; read timeouts are set per fetch function
+CONNECT_TIMEOUT = 3
+
+# Read timeout (seconds) for headers-only freshness probes
+HEAD_READ_TIMEOUT = 5
+
+# Upper bound (seconds) on how long a Retry-After header can make us wait
+RETRY_AFTER_MAX = 60.0
+
+# Default freshness (seconds) of cached responses without Cache-Control max-age.
+# An entry is served unconfirmed for at most its TTL; the app keeps each fetch
+# for one more cache window (REALTIME_CACHE_SECONDS / FORECAST_CACHE_SECONDS in
+# app.py), so displayed data is at most TTL + window old.
+OBSERVATION_CACHE_TTL = 600
+FORECAST_CACHE_TTL = 3600
+
+# Seconds after expiry during which a cache entry is revalidated with a HEAD
+# probe before a GET. A matching probe only reuses data the server confirmed
+# unchanged, so it does not add to the staleness limit above.
+HEAD_PROBE_WINDOW = 600
+
+# Enable TCP keepalive so idle pooled connections are detected as dead
+_SOCKET_OPTIONS = HTTPConnection.default_socket_options + [
+    (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+]
+if hasattr(socket, "TCP_KEEPIDLE"):
+    _SOCKET_OPTIONS.append((socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, 60))
+if hasattr(socket, "TCP_KEEPINTVL"):
+    _SOCKET_OPTIONS.append((socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, 30))
+
+
+class _KeepAliveAdapter(HTTPAdapter):
+    """HTTPAdapter that enables TCP keepalive on pooled sockets."""
+    
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["socket_options"] = _SOCKET_OPTIONS
+        super().init_poolmanager(*args, **kwargs)
+
+
+def _create_session() -> requests.Session:
+    """Create the HTTP session shared by all CWA API requests.
+    
+    Retries are left to the explicit backoff loops in the fetch functions.
+    
+    Returns:
+        Configured requests Session.
+    """
+    session = requests.Session()
+    adapter = _KeepAliveAdapter(pool_connections=4, pool_maxsize=10, max_retries=0)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({
+        "Accept": "application/json",
+        # Every coding urllib3 can decode here ("br" once brotli is installed);
+        # the streamed body is decompressed transparently via decode_content
+        "Accept-Encoding": ACCEPT_ENCODING,
+        "User-Agent": "LECTURE13/1.0"
+    })
+    return session
+
+
+# Reuse keep-alive connections across requests and retries
+_SESSION = _create_session()
+
 
 @dataclass
 class WeatherData:
@@ -42,6 +143,126 @@ class WeatherData:
     wind_speed: Optional[float] = None
 
 
+@dataclass
+class _CachedResponse:
+    """Parsed API response kept for TTL reuse and conditional revalidation."""
+    
+    expires_at: float
+    ttl: float
+    etag: Optional[str]
+    last_modified: Optional[str]
+    parsed: Any
+
+
+# Parsed responses keyed by endpoint
+_RESPONSE_CACHE: dict[str, _CachedResponse] = {}
+
+_MAX_AGE_PATTERN = re.compile(r"max-age=(\d+)")
+
+
+def _get_fresh_cached(endpoint: str) -> Optional[Any]:
+    """Get the cached parsed response for an endpoint if it is still fresh."""
+    cached = _RESPONSE_CACHE.get(endpoint)
+    if cached is not None and time.monotonic() < cached.expires_at:
+        logger.info("Using cached response for %s", endpoint)
+        return cached.parsed
+    return None
+
+
+def _conditional_headers(endpoint: str) -> dict:
+    """Get If-None-Match/If-Modified-Since headers for revalidating a cache entry."""
+    cached = _RESPONSE_CACHE.get(endpoint)
+    headers = {}
+    if cached is not None:
+        if cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+    return headers
+
+
+def _response_ttl(response: requests.Response, default_ttl: int) -> int:
+    """Get cache lifetime from the Cache-Control max-age, or the default."""
+    match = _MAX_AGE_PATTERN.search(response.headers.get("Cache-Control", ""))
+    return int(match.group(1)) if match else default_ttl
+
+
+def _revalidate_cached(endpoint: str, response: requests.Response, default_ttl: int) -> Any:
+    """Extend a cache entry after a 304 Not Modified response and return it."""
+    cached = _RESPONSE_CACHE[endpoint]
+    cached.ttl = _response_ttl(response, default_ttl)
+    cached.expires_at = time.monotonic() + cached.ttl
+    logger.info("%s not modified; reusing cached response", endpoint)
+    return cached.parsed
+
+
+def _is_still_fresh(endpoint: str, url: str, params: dict, default_ttl: int) -> bool:
+    """Check with a HEAD request whether an expired cache entry is unchanged.
+    
+    Only entries expired less than ``HEAD_PROBE_WINDOW`` seconds ago are
+    probed, so a long-idle cache goes straight to a (conditional) GET. If
+    the validators match, the entry's lifetime is extended.
+    
+    Args:
+        endpoint: CWA dataset id the entry is cached under.
+        url: Dataset URL.
+        params: Query parameters for the dataset request.
+        default_ttl: Lifetime to use without a Cache-Control max-age.
+        
+    Returns:
+        True if the cached response can be reused without a GET.
+    """
+    cached = _RESPONSE_CACHE.get(endpoint)
+    if cached is None or not (cached.etag or cached.last_modified):
+        return False
+    if time.monotonic() >= cached.expires_at + HEAD_PROBE_WINDOW:
+        return False
+    
+    try:
+        response = _SESSION.head(
+            url,
+            params=params,
+            timeout=(CONNECT_TIMEOUT, HEAD_READ_TIMEOUT),
+            verify=False
+        )
+    except requests.RequestException as e:
+        logger.debug("HEAD probe for %s failed: %s", endpoint, e)
+        return False
+    
+    if not response.ok:
+        return False
+    validators = [
+        (cached.etag, response.headers.get("ETag")),
+        (cached.last_modified, response.headers.get("Last-Modified"))
+    ]
+    if any(ours and ours != theirs for ours, theirs in validators):
+        return False
+    
+    cached.ttl = _response_ttl(response, default_ttl)
+    cached.expires_at = time.monotonic() + cached.ttl
+    logger.info("%s unchanged per HEAD probe; reusing cached response", endpoint)
+    return True
+
+
+def _store_cached(endpoint: str, response: requests.Response, parsed: Any, default_ttl: int):
+    """Cache a parsed response along with its validators."""
+    ttl = _response_ttl(response, default_ttl)
+    _RESPONSE_CACHE[endpoint] = _CachedResponse(
+        expires_at=time.monotonic() + ttl,
+        ttl=ttl,
+        etag=response.headers.get("ETag"),
+        last_modified=response.headers.get("Last-Modified"),
+        parsed=parsed
+    )
+
+
+def expire_response_cache():
+    """Mark all cached responses stale so the next fetch revalidates them."""
+    for cached in _RESPONSE_CACHE.values():
+        # -inf also keeps the entry out of the HEAD probe window
+        cached.expires_at = float("-inf")
+
+
 def fetch_weather_data(
     max_retries: int = 3,
     timeout: int = 10,
@@ -51,7 +272,7 @@ def fetch_weather_data(
     
     Args:
         max_retries: Maximum number of retry attempts.
-        timeout: Request timeout in seconds.
+        timeout: Read timeout in seconds.
         base_delay: Base delay for exponential backoff.
         
     Returns:
@@ -60,6 +281,10 @@ def fetch_weather_data(
     Raises:
         requests.RequestException: If all retries fail.
     """
+    cached = _get_fresh_cached(STATION_OBSERVATION_ENDPOINT)
+    if cached is not None:
+        return cached
+    
     api_key = get_cwa_api_key()
     url = f"{CWA_API_BASE_URL}/{STATION_OBSERVATION_ENDPOINT}"
     params = {
@@ -67,47 +292,223 @@ def fetch_weather_data(
         "format": "JSON"
     }
     
+    if _is_still_fresh(STATION_OBSERVATION_ENDPOINT, url, params, OBSERVATION_CACHE_TTL):
+        return _RESPONSE_CACHE[STATION_OBSERVATION_ENDPOINT].parsed
+    
     last_exception = None
     
     for attempt in range(max_retries):
+        retry_after = None
         try:
-            logger.info(f"Fetching weather data (attempt {attempt + 1}/{max_retries})")
+            logger.info("Fetching weather data (attempt %d/%d)", attempt + 1, max_retries)
             # Use verify=False for Streamlit Cloud SSL issues
             # Check if running in cloud environment
             verify_ssl = not os.getenv('STREAMLIT_SHARING_MODE', False)
-            response = requests.get(url, params=params, timeout=timeout, verify=False)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            if data.get("success") != "true":
-                raise ValueError(f"API returned unsuccessful response: {data}")
+            with _SESSION.get(
+                url,
+                params=params,
+                headers=_conditional_headers(STATION_OBSERVATION_ENDPOINT),
+                timeout=(CONNECT_TIMEOUT, timeout),
+                verify=False,
+                stream=True
+            ) as response:
+                if response.status_code == 304:
+                    return _revalidate_cached(STATION_OBSERVATION_ENDPOINT, response, OBSERVATION_CACHE_TTL)
+                response.raise_for_status()
+                
+                weather_data = _parse_stations(
+                    _iter_response_items(response, STATION_ITEMS_PREFIX)
+                )
             
-            weather_data = parse_weather_response(data)
-            logger.info(f"Successfully fetched {len(weather_data)} weather records")
+            logger.info("Successfully fetched %d weather records", len(weather_data))
+            _store_cached(STATION_OBSERVATION_ENDPOINT, response, weather_data, OBSERVATION_CACHE_TTL)
             return weather_data
             
         except requests.Timeout as e:
             last_exception = e
-            logger.warning(f"Request timeout (attempt {attempt + 1}/{max_retries})")
+            logger.warning("Request timeout (attempt %d/%d)", attempt + 1, max_retries)
+        except requests.HTTPError as e:
+            last_exception = e
+            retry_after = _retry_after_seconds(e.response)
+            logger.warning("Request failed (attempt %d/%d): %s", attempt + 1, max_retries, e)
         except requests.RequestException as e:
             last_exception = e
-            logger.warning(f"Request failed (attempt {attempt + 1}/{max_retries}): {e}")
+            logger.warning("Request failed (attempt %d/%d): %s", attempt + 1, max_retries, e)
         except (ValueError, KeyError) as e:
             last_exception = e
-            logger.error(f"Failed to parse response: {e}")
+            logger.error("Failed to parse response: %s", e)
             raise
         
         # Exponential backoff
         if attempt < max_retries - 1:
-            delay = base_delay * (2 ** attempt)
-            logger.info(f"Retrying in {delay:.1f} seconds...")
+            delay = _backoff_delay(attempt, base_delay, retry_after)
+            logger.info("Retrying in %.1f seconds...", delay)
             time.sleep(delay)
     
-    logger.error(f"All {max_retries} attempts failed")
+    logger.error("All %d attempts failed", max_retries)
     raise last_exception or requests.RequestException("All retries failed")
 
 
+def _backoff_delay(
+    attempt: int,
+    base_delay: float,
+    retry_after: Optional[float] = None,
+    cap: float = 30.0
+) -> float:
+    """Get a full-jitter exponential backoff delay.
+    
+    Args:
+        attempt: Zero-based attempt number that just failed.
+        base_delay: Base delay in seconds.
+        retry_after: Server-requested delay in seconds, if any.
+        cap: Maximum delay in seconds.
+        
+    Returns:
+        Random delay between 0 and min(cap, base_delay * 2**attempt), raised
+        to the server-requested delay (up to RETRY_AFTER_MAX) when given.
+    """
+    delay = random.uniform(0, min(cap, base_delay * (2 ** attempt)))
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, RETRY_AFTER_MAX))
+    return delay
+
+
+def _retry_after_seconds(response: Optional[requests.Response]) -> Optional[float]:
+    """Get the Retry-After delay of a rate-limited response.
+    
+    Args:
+        response: Failed HTTP response.
+        
+    Returns:
+        Delay in seconds for 429/503 responses with a valid Retry-After
+        header (seconds or HTTP-date), otherwise None.
+    """
+    if response is None or response.status_code not in (429, 503):
+        return None
+    
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def _iter_response_items(response: requests.Response, prefix: str) -> Iterator[dict]:
+    """Iterate the JSON objects found at a path in a CWA API response.
+    
+    With ijson installed the body is stream-parsed, so only one chunk of
+    items is materialized at a time; otherwise the whole body is decoded
+    first (with orjson when available). CWA sends the ``success`` flag
+    first, so it is normally checked on the opening chunk before parsing
+    items; when it comes later it is picked up while streaming and checked
+    once the body is done.
+    
+    Args:
+        response: Successful response opened with ``stream=True``.
+        prefix: ijson-style item path, e.g. "records.Station.item".
+        
+    Yields:
+        Item dictionaries.
+        
+    Raises:
+        ValueError: If the API response is not marked successful.
+        requests.RequestException: If the body cannot be read or decoded.
+    """
+    if ijson is None:
+        try:
+            data = orjson.loads(response.content) if orjson is not None else response.json()
+        except ValueError as e:
+            raise requests.exceptions.InvalidJSONError(str(e), response=response) from e
+        _check_success_flag(data.get("success"))
+        yield from _walk_items(data, prefix.split("."))
+        return
+    
+    # iter_content maps urllib3 read errors to requests exceptions
+    chunks = response.iter_content(RESPONSE_CHUNK_SIZE)
+    first = next(chunks, b"")
+    reader = _ChunkReader(first, chunks)
+    success = _find_success_flag(first)
+    flags = []
+    try:
+        if success is not None:
+            _check_success_flag(success)
+            yield from ijson.items(reader, prefix, use_float=True)
+            return
+        events = _record_success_flag(ijson.parse(reader, use_float=True), flags)
+        yield from ijson.items(events, prefix)
+    except ijson.JSONError as e:
+        raise requests.exceptions.InvalidJSONError(str(e), response=response) from e
+    _check_success_flag(flags[0] if flags else None)
+
+
+def _find_success_flag(chunk: bytes) -> Optional[Any]:
+    """Get the top-level success flag if it is complete within a body chunk."""
+    try:
+        for path, _, value in ijson.parse(io.BytesIO(chunk), buf_size=_SUCCESS_SCAN_SIZE):
+            if path == "success":
+                return value
+    except ijson.JSONError:
+        pass
+    return None
+
+
+def _record_success_flag(events: Iterator[tuple], flags: list) -> Iterator[tuple]:
+    """Pass ijson parse events through, appending the top-level success flag to ``flags``."""
+    for event in events:
+        if event[0] == "success":
+            flags.append(event[2])
+        yield event
+
+
+def _check_success_flag(success: Any):
+    """Raise ValueError unless a CWA response's success flag is "true"."""
+    if success is None:
+        raise ValueError("API response has no success flag")
+    if success != "true":
+        raise ValueError(f"API returned unsuccessful response: success={success!r}")
+
+
+class _ChunkReader:
+    """Minimal file-like view of a byte chunk iterator, for ijson."""
+    
+    def __init__(self, first: bytes, rest: Iterator[bytes]):
+        self._first = first
+        self._rest = rest
+    
+    def read(self, size: int = -1) -> bytes:
+        # ijson probes the source type with read(0)
+        if size == 0:
+            return b""
+        if self._first:
+            chunk, self._first = self._first, b""
+            return chunk
+        return next(self._rest, b"")
+
+
+def _walk_items(node: Any, parts: list[str]) -> Iterator[dict]:
+    """Yield the objects at an ijson-style path in a decoded JSON tree."""
+    if not parts:
+        yield node
+        return
+    head, rest = parts[0], parts[1:]
+    if head == "item":
+        for child in node or []:
+            yield from _walk_items(child, rest)
+    elif isinstance(node, dict):
+        yield from _walk_items(node.get(head), rest)
+
+
 def parse_weather_response(response_data: dict) -> list[dict]:
     """Parse CWA API response and extract weather data.
     
@@ -117,9 +518,20 @@ def parse_weather_response(response_data: dict) -> list[dict]:
     Returns:
         List of parsed weather data dictionaries.
     """
-    weather_list = []
-    
     stations = response_data.get("records", {}).get("Station", [])
+    return _parse_stations(stations)
+
+
+def _parse_stations(stations: Iterable[dict]) -> list[dict]:
+    """Parse station records, skipping invalid ones.
+    
+    Args:
+        stations: Station data dictionaries from the API response.
+        
+    Returns:
+        List of parsed weather data dictionaries.
+    """
+    weather_list = []
     
     for station in stations:
         try:
@@ -128,7 +540,7 @@ def parse_weather_response(response_data: dict) -> list[dict]:
                 weather_list.append(parsed)
         except Exception as e:
             station_name = station.get("StationName", "Unknown")
-            logger.warning(f"Failed to parse station '{station_name}': {e}")
+            logger.warning("Failed to parse station '%s': %s", station_name, e)
             continue
     
     return weather_list
@@ -147,49 +559,51 @@ def parse_station_data(station: dict) -> Optional[dict]:
     if not station_name:
         return None
     
+    # Bind hot lookups to locals; "or {}" also covers explicit nulls
+    _sf = _safe_float
+    geo_info = station.get("GeoInfo") or {}
+    weather_element = station.get("WeatherElement") or {}
+    obs = station.get("ObsTime") or {}
+    
     # Get coordinates (use WGS84)
-    geo_info = station.get("GeoInfo", {})
-    coordinates = geo_info.get("Coordinates", [])
+    coordinates = geo_info.get("Coordinates") or []
     
     lat, lon = None, None
-    for coord in coordinates:
-        if coord.get("CoordinateName") == "WGS84":
-            lat = _safe_float(coord.get("StationLatitude"))
-            lon = _safe_float(coord.get("StationLongitude"))
-            break
+    wgs84 = {c.get("CoordinateName"): c for c in coordinates}.get("WGS84")
+    if wgs84:
+        lat = _sf(wgs84.get("StationLatitude"))
+        lon = _sf(wgs84.get("StationLongitude"))
     
     # Fallback to first available coordinates
     if lat is None and coordinates:
-        lat = _safe_float(coordinates[0].get("StationLatitude"))
-        lon = _safe_float(coordinates[0].get("StationLongitude"))
+        first = coordinates[0]
+        lat = _sf(first.get("StationLatitude"))
+        lon = _sf(first.get("StationLongitude"))
     
     if lat is None or lon is None:
-        logger.debug(f"Station '{station_name}' has no valid coordinates")
+        logger.debug("Station '%s' has no valid coordinates", station_name)
         return None
     
     # Get weather elements
-    weather_element = station.get("WeatherElement", {})
-    temperature = _safe_float(weather_element.get("AirTemperature"))
+    element = weather_element.get
+    temperature = _sf(element("AirTemperature"))
     
     if temperature is None:
-        logger.debug(f"Station '{station_name}' has no temperature data")
+        logger.debug("Station '%s' has no temperature data", station_name)
         return None
     
-    # Get observation time
-    obs_time = station.get("ObsTime", {}).get("DateTime", "")
-    
     return {
         "location_name": station_name,
         "latitude": lat,
         "longitude": lon,
         "temperature": temperature,
         "unit": "C",
-        "observation_time": obs_time,
+        "observation_time": obs.get("DateTime", ""),
         "county_name": geo_info.get("CountyName", ""),
         "town_name": geo_info.get("TownName", ""),
-        "weather_description": weather_element.get("Weather", ""),
-        "humidity": _safe_float(weather_element.get("RelativeHumidity")),
-        "wind_speed": _safe_float(weather_element.get("WindSpeed"))
+        "weather_description": element("Weather", ""),
+        "humidity": _sf(element("RelativeHumidity")),
+        "wind_speed": _sf(element("WindSpeed"))
     }
 
 
@@ -202,74 +616,135 @@ def _safe_float(value) -> Optional[float]:
     Returns:
         Float value or None if conversion fails.
     """
-    if value is None or value == "" or value == "-99":
-        return None
     try:
+        if value in _SENTINELS:
+            return None
+        if type(value) is float:
+            return value
         return float(value)
     except (ValueError, TypeError):
+        # TypeError also covers unhashable values in the sentinel lookup
         return None
 
 
 def fetch_weekly_forecast(
     max_retries: int = 3,
     timeout: int = 15,
-    base_delay: float = 1.0
+    base_delay: float = 1.0,
+    time_filter: Optional[Callable[[str], bool]] = None
 ) -> dict:
     """Fetch one-week weather forecast from CWA.
     
+    Args:
+        max_retries: Maximum number of retry attempts.
+        timeout: Read timeout in seconds.
+        base_delay: Base delay for exponential backoff.
+        time_filter: Optional predicate on "YYYY-MM-DD HH:MM" time keys;
+            slots it rejects are skipped while parsing.
+    
     Returns:
         Dictionary with 'dates' list and 'by_date' mapping.
     """
+    cached = _get_fresh_cached(WEEKLY_FORECAST_ENDPOINT)
+    if cached is not None:
+        return _select_forecast_times(cached, time_filter)
+    
     api_key = get_cwa_api_key()
     url = f"{CWA_API_BASE_URL}/{WEEKLY_FORECAST_ENDPOINT}"
     params = {"Authorization": api_key, "format": "JSON"}
     
+    if _is_still_fresh(WEEKLY_FORECAST_ENDPOINT, url, params, FORECAST_CACHE_TTL):
+        return _select_forecast_times(_RESPONSE_CACHE[WEEKLY_FORECAST_ENDPOINT].parsed, time_filter)
+    
     last_exception = None
     
     for attempt in range(max_retries):
+        retry_after = None
         try:
-            logger.info(f"Fetching weekly forecast (attempt {attempt + 1}/{max_retries})")
+            logger.info("Fetching weekly forecast (attempt %d/%d)", attempt + 1, max_retries)
             # Use verify=False for Streamlit Cloud SSL issues
-            response = requests.get(url, params=params, timeout=timeout, verify=False)
-            response.raise_for_status()
-            data = response.json()
-            
-            if data.get("success") != "true":
-                raise ValueError(f"API unsuccessful: {data}")
+            with _SESSION.get(
+                url,
+                params=params,
+                headers=_conditional_headers(WEEKLY_FORECAST_ENDPOINT),
+                timeout=(CONNECT_TIMEOUT, timeout),
+                verify=False,
+                stream=True
+            ) as response:
+                if response.status_code == 304:
+                    cached = _revalidate_cached(WEEKLY_FORECAST_ENDPOINT, response, FORECAST_CACHE_TTL)
+                    return _select_forecast_times(cached, time_filter)
+                response.raise_for_status()
+                
+                forecast = _parse_forecast_locations(
+                    _iter_response_items(response, FORECAST_LOCATION_ITEMS_PREFIX),
+                    time_filter
+                )
             
-            forecast = parse_weekly_forecast(data)
-            logger.info(f"Fetched forecast for {len(forecast.get('dates', []))} time slots")
+            logger.info("Fetched forecast for %d time slots", len(forecast.get("dates", [])))
+            # Only complete forecasts are cached; filtered views are derived from them
+            if time_filter is None:
+                _store_cached(WEEKLY_FORECAST_ENDPOINT, response, forecast, FORECAST_CACHE_TTL)
             return forecast
             
         except requests.Timeout as e:
             last_exception = e
-            logger.warning(f"Timeout (attempt {attempt + 1}/{max_retries})")
+            logger.warning("Timeout (attempt %d/%d)", attempt + 1, max_retries)
+        except requests.HTTPError as e:
+            last_exception = e
+            retry_after = _retry_after_seconds(e.response)
+            logger.warning("Request failed: %s", e)
         except requests.RequestException as e:
             last_exception = e
-            logger.warning(f"Request failed: {e}")
+            logger.warning("Request failed: %s", e)
         except Exception as e:
-            logger.error(f"Parse error: {e}")
+            logger.error("Parse error: %s", e)
             raise
         
         if attempt < max_retries - 1:
-            time.sleep(base_delay * (2 ** attempt))
+            delay = _backoff_delay(attempt, base_delay, retry_after)
+            logger.info("Retrying in %.1f seconds...", delay)
+            time.sleep(delay)
     
     raise last_exception or requests.RequestException("All retries failed")
 
 
-def parse_weekly_forecast(data: dict) -> dict:
+def parse_weekly_forecast(
+    data: dict,
+    time_filter: Optional[Callable[[str], bool]] = None
+) -> dict:
     """Parse F-D0047-091 response into structured format."""
-    result = {"dates": [], "by_date": {}}
-    
     try:
         locations_data = data.get("records", {}).get("Locations", [])
         if not locations_data:
-            return result
+            return {"dates": [], "by_date": {}}
         
-        locations = locations_data[0].get("Location", [])
-        all_times = set()
+        return _parse_forecast_locations(locations_data[0].get("Location", []), time_filter)
         
-        for loc in locations:
+    except Exception as e:
+        logger.error("Failed to parse forecast: %s", e)
+        return {"dates": [], "by_date": {}}
+
+
+def _parse_forecast_locations(
+    locations: Iterable[dict],
+    time_filter: Optional[Callable[[str], bool]] = None
+) -> dict:
+    """Parse forecast locations into time-slot keyed records.
+    
+    Args:
+        locations: Location dictionaries from the F-D0047-091 response.
+        time_filter: Optional predicate on time keys; rejected slots are
+            skipped before their values are parsed.
+    
+    Returns:
+        Dictionary with 'dates' list and 'by_date' mapping.
+    """
+    by_date = defaultdict(list)
+    all_times = set()
+    
+    for loc in locations:
+        try:
             location_name = loc.get("LocationName", "")
             lat = _safe_float(loc.get("Latitude"))
             lon = _safe_float(loc.get("Longitude"))
@@ -278,8 +753,9 @@ def parse_weekly_forecast(data: dict) -> dict:
                 continue
             
             elements = loc.get("WeatherElement", [])
-            temp_elem = next((e for e in elements if e.get("ElementName") == "平均溫度"), None)
-            wx_elem = next((e for e in elements if e.get("ElementName") == "天氣現象"), None)
+            by_name = {e.get("ElementName"): e for e in elements}
+            temp_elem = by_name.get(_TEMP_ELEM)
+            wx_elem = by_name.get(_WX_ELEM)
             
             if not temp_elem:
                 continue
@@ -289,15 +765,13 @@ def parse_weekly_forecast(data: dict) -> dict:
             
             for i, t in enumerate(temp_times):
                 start_time = t.get("StartTime", "")
-                if not start_time:
+                if len(start_time) < 16:
                     continue
                 
-                # Parse time
-                try:
-                    dt = datetime.fromisoformat(start_time.replace("+08:00", ""))
-                    time_key = dt.strftime("%Y-%m-%d %H:%M")
-                except:
-                    time_key = start_time[:16]
+                # ISO-8601 "YYYY-MM-DDTHH:MM:SS+08:00" -> "YYYY-MM-DD HH:MM"
+                time_key = start_time[:16].replace("T", " ")
+                if time_filter is not None and not time_filter(time_key):
+                    continue
                 
                 all_times.add(time_key)
                 
@@ -331,16 +805,50 @@ def parse_weekly_forecast(data: dict) -> dict:
                     "town_name": ""
                 }
                 
-                if time_key not in result["by_date"]:
-                    result["by_date"][time_key] = []
-                result["by_date"][time_key].append(record)
-        
-        result["dates"] = sorted(list(all_times))
-        
-    except Exception as e:
-        logger.error(f"Failed to parse forecast: {e}")
+                by_date[time_key].append(record)
+        except Exception as e:
+            logger.warning("Failed to parse location '%s': %s", loc.get("LocationName", "Unknown"), e)
     
-    return result
+    # Plain dict so lookups of missing slots don't insert empty lists
+    return {"dates": sorted(all_times), "by_date": dict(by_date)}
+
+
+def _select_forecast_times(
+    forecast: dict,
+    time_filter: Optional[Callable[[str], bool]]
+) -> dict:
+    """Restrict a parsed forecast to the time slots accepted by a filter.
+    
+    Args:
+        forecast: Dictionary with 'dates' list and 'by_date' mapping.
+        time_filter: Predicate on time keys, or None to keep every slot.
+    
+    Returns:
+        The forecast itself without a filter, otherwise a filtered copy.
+    """
+    if time_filter is None:
+        return forecast
+    dates = [d for d in forecast.get("dates", []) if time_filter(d)]
+    by_date = forecast.get("by_date", {})
+    return {"dates": dates, "by_date": {d: by_date[d] for d in dates if d in by_date}}
+
+
+def fetch_all() -> tuple[list[dict], dict]:
+    """Fetch real-time observations and the weekly forecast concurrently.
+    
+    Both requests share the pooled session, so the total latency is that of
+    the slower endpoint rather than the sum of both.
+    
+    Returns:
+        Tuple of (station observations, weekly forecast).
+        
+    Raises:
+        requests.RequestException: If either request fails after retries.
+    """
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        observations = executor.submit(fetch_weather_data)
+        forecast = executor.submit(fetch_weekly_forecast)
+        return observations.result(), forecast.result()
 
 
 def get_forecast_dates(forecast: dict) -> list[str]:
@@ -355,13 +863,14 @@ def get_forecast_by_date(forecast: dict, date_key: str) -> list[dict]:
 
 if __name__ == "__main__":
     # Quick test
+    logging.basicConfig(level=logging.INFO)
     try:
+        data, forecast = fetch_all()
+        
         print("=== Real-time Data ===")
-        data = fetch_weather_data()
         print(f"Retrieved {len(data)} stations")
         
         print("\n=== Weekly Forecast ===")
-        forecast = fetch_weekly_forecast()
         dates = get_forecast_dates(forecast)
         print(f"Time slots: {len(dates)}")
         print(f"First 3: {dates[:3]}")
@@ -2,15 +2,44 @@
 
 import logging
 import sqlite3
+import threading
 from contextlib import contextmanager
 from datetime import datetime, timedelta
+from operator import itemgetter
 from pathlib import Path
 from typing import Optional
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Maximum rows removed per transaction by cleanup_old_data
+CLEANUP_BATCH_SIZE = 5000
+
+# Record keys in weather_records upsert parameter order
+_ROW_KEYS = (
+    "location_name", "latitude", "longitude", "temperature", "unit",
+    "observation_time", "county_name", "town_name", "weather_description",
+    "humidity", "wind_speed"
+)
+_row_tuple = itemgetter(*_ROW_KEYS)
+
+
+def _record_row(record: dict) -> tuple:
+    """Build upsert parameters from a weather record.
+    
+    Records from the scraper carry every key, so a single itemgetter call
+    covers them; partial records fall back to per-key defaults.
+    
+    Args:
+        record: Weather data dictionary.
+        
+    Returns:
+        Parameter tuple in ``_ROW_KEYS`` order.
+    """
+    try:
+        return _row_tuple(record)
+    except KeyError:
+        return tuple(record.get(key, "C" if key == "unit" else None) for key in _ROW_KEYS)
+
 
 class WeatherDatabase:
     """SQLite database manager for weather data.
@@ -20,6 +49,10 @@ class WeatherDatabase:
     - Data insertion with upsert logic
     - Query operations
     - Data cleanup and retention
+    
+    A single instance may be shared across threads (e.g. via
+    ``st.cache_resource``). Writes and reads use separate connections,
+    each serialized by its own lock; queries go through a read-only one.
     """
     
     def __init__(self, db_path: str = "data/weather.db"):
@@ -31,32 +64,80 @@ class WeatherDatabase:
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
         self._connection: Optional[sqlite3.Connection] = None
+        self._read_connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+        self._read_lock = threading.RLock()
         self._init_db()
     
     @property
     def connection(self) -> sqlite3.Connection:
         """Get database connection, creating if necessary."""
         if self._connection is None:
-            self._connection = sqlite3.connect(
+            # check_same_thread=False lets the shared instance be used from
+            # Streamlit's script threads; self._lock serializes access to it.
+            conn = sqlite3.connect(
                 str(self.db_path),
                 check_same_thread=False
             )
-            self._connection.row_factory = sqlite3.Row
+            conn.row_factory = sqlite3.Row
+            # WAL lets readers proceed while a write is in progress, and
+            # synchronous=NORMAL is still crash-safe in WAL mode
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            conn.execute("PRAGMA cache_size=-20000")  # ~20 MB page cache
+            conn.execute("PRAGMA mmap_size=268435456")  # 256 MB
+            self._connection = conn
         return self._connection
     
+    @property
+    def read_connection(self) -> sqlite3.Connection:
+        """Get the read-only connection used by query methods, creating if necessary.
+        
+        With WAL enabled this reader sees committed data without waiting on
+        the write connection.
+        """
+        if self._read_connection is None:
+            conn = sqlite3.connect(
+                f"{self.db_path.resolve().as_uri()}?mode=ro",
+                uri=True,
+                check_same_thread=False
+            )
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA query_only=ON")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            conn.execute("PRAGMA cache_size=-20000")
+            conn.execute("PRAGMA mmap_size=268435456")
+            self._read_connection = conn
+        return self._read_connection
+    
     @contextmanager
     def get_cursor(self):
         """Context manager for database cursor with automatic commit/rollback."""
-        cursor = self.connection.cursor()
-        try:
-            yield cursor
-            self.connection.commit()
-        except Exception as e:
-            self.connection.rollback()
-            logger.error(f"Database error: {e}")
-            raise
-        finally:
-            cursor.close()
+        with self._lock:
+            cursor = self.connection.cursor()
+            try:
+                yield cursor
+                self.connection.commit()
+            except Exception as e:
+                self.connection.rollback()
+                logger.error("Database error: %s", e)
+                raise
+            finally:
+                cursor.close()
+    
+    @contextmanager
+    def get_read_cursor(self):
+        """Context manager for a cursor on the read-only connection."""
+        with self._read_lock:
+            cursor = self.read_connection.cursor()
+            try:
+                yield cursor
+            except Exception as e:
+                logger.error("Database error: %s", e)
+                raise
+            finally:
+                cursor.close()
     
     def _init_db(self):
         """Initialize database schema."""
@@ -82,10 +163,10 @@ class WeatherDatabase:
         create_indexes_sql = [
             """CREATE UNIQUE INDEX IF NOT EXISTS idx_location_observation 
                ON weather_records(location_name, observation_time);""",
-            """CREATE INDEX IF NOT EXISTS idx_created_at 
-               ON weather_records(created_at);""",
             """CREATE INDEX IF NOT EXISTS idx_observation_time 
-               ON weather_records(observation_time);"""
+               ON weather_records(observation_time);""",
+            # Retention now filters on observation_time; drop the unused index
+            "DROP INDEX IF EXISTS idx_created_at;"
         ]
         
         with self.get_cursor() as cursor:
@@ -93,7 +174,7 @@ class WeatherDatabase:
             for index_sql in create_indexes_sql:
                 cursor.execute(index_sql)
         
-        logger.info(f"Database initialized at {self.db_path}")
+        logger.info("Database initialized at %s", self.db_path)
     
     def save_weather_data(self, data: list[dict]) -> int:
         """Save weather data to database with upsert logic.
@@ -126,28 +207,24 @@ class WeatherDatabase:
             updated_at = CURRENT_TIMESTAMP;
         """
         
+        rows = [_record_row(record) for record in data]
+        
         saved_count = 0
         with self.get_cursor() as cursor:
-            for record in data:
-                try:
-                    cursor.execute(upsert_sql, (
-                        record.get("location_name"),
-                        record.get("latitude"),
-                        record.get("longitude"),
-                        record.get("temperature"),
-                        record.get("unit", "C"),
-                        record.get("observation_time"),
-                        record.get("county_name"),
-                        record.get("town_name"),
-                        record.get("weather_description"),
-                        record.get("humidity"),
-                        record.get("wind_speed")
-                    ))
-                    saved_count += 1
-                except sqlite3.Error as e:
-                    logger.warning(f"Failed to save record for {record.get('location_name')}: {e}")
+            try:
+                cursor.executemany(upsert_sql, rows)
+                saved_count = len(rows)
+            except sqlite3.Error as e:
+                # Fall back to per-row upserts so one bad record doesn't drop the batch
+                logger.warning("Batch save failed (%s), retrying row by row", e)
+                for row in rows:
+                    try:
+                        cursor.execute(upsert_sql, row)
+                        saved_count += 1
+                    except sqlite3.Error as e:
+                        logger.warning("Failed to save record for %s: %s", row[0], e)
         
-        logger.info(f"Saved {saved_count} records to database")
+        logger.info("Saved %d records to database", saved_count)
         return saved_count
     
     def get_latest_data(self) -> list[dict]:
@@ -156,17 +233,21 @@ class WeatherDatabase:
         Returns:
             List of weather data dictionaries for latest observations.
         """
+        # The GROUP BY is answered from idx_location_observation, and the join
+        # back uses the same index, instead of a subquery per outer row
         query = """
-        SELECT * FROM weather_records w1
-        WHERE observation_time = (
-            SELECT MAX(observation_time) 
-            FROM weather_records w2 
-            WHERE w2.location_name = w1.location_name
-        )
-        ORDER BY location_name;
+        SELECT w.* FROM weather_records w
+        JOIN (
+            SELECT location_name, MAX(observation_time) AS max_time
+            FROM weather_records
+            GROUP BY location_name
+        ) m
+        ON w.location_name = m.location_name
+        AND w.observation_time = m.max_time
+        ORDER BY w.location_name;
         """
         
-        with self.get_cursor() as cursor:
+        with self.get_read_cursor() as cursor:
             cursor.execute(query)
             rows = cursor.fetchall()
         
@@ -187,7 +268,7 @@ class WeatherDatabase:
         ORDER BY observation_time DESC;
         """
         
-        with self.get_cursor() as cursor:
+        with self.get_read_cursor() as cursor:
             cursor.execute(query, (location,))
             rows = cursor.fetchall()
         
@@ -213,7 +294,7 @@ class WeatherDatabase:
         ORDER BY observation_time DESC, location_name;
         """
         
-        with self.get_cursor() as cursor:
+        with self.get_read_cursor() as cursor:
             cursor.execute(query, (start_time, end_time))
             rows = cursor.fetchall()
         
@@ -228,18 +309,30 @@ class WeatherDatabase:
         Returns:
             Number of records deleted.
         """
-        cutoff_date = (datetime.now() - timedelta(days=days)).isoformat()
+        cutoff_date = (datetime.now() - timedelta(days=days)).isoformat(timespec="seconds")
         
+        # Delete in bounded chunks via idx_observation_time so no single
+        # transaction (and WAL growth) covers the whole backlog
         delete_sql = """
         DELETE FROM weather_records
-        WHERE created_at < ?;
+        WHERE rowid IN (
+            SELECT rowid FROM weather_records
+            WHERE observation_time < ?
+            ORDER BY observation_time
+            LIMIT ?
+        );
         """
         
-        with self.get_cursor() as cursor:
-            cursor.execute(delete_sql, (cutoff_date,))
-            deleted_count = cursor.rowcount
+        deleted_count = 0
+        while True:
+            with self.get_cursor() as cursor:
+                cursor.execute(delete_sql, (cutoff_date, CLEANUP_BATCH_SIZE))
+                deleted = cursor.rowcount
+            deleted_count += deleted
+            if deleted < CLEANUP_BATCH_SIZE:
+                break
         
-        logger.info(f"Cleaned up {deleted_count} old records (older than {days} days)")
+        logger.info("Cleaned up %d old records (older than %d days)", deleted_count, days)
         return deleted_count
     
     def get_statistics(self) -> dict:
@@ -248,33 +341,42 @@ class WeatherDatabase:
         Returns:
             Dictionary with statistics.
         """
-        with self.get_cursor() as cursor:
-            cursor.execute("SELECT COUNT(*) as total FROM weather_records")
-            total = cursor.fetchone()["total"]
-            
-            cursor.execute("SELECT COUNT(DISTINCT location_name) as locations FROM weather_records")
-            locations = cursor.fetchone()["locations"]
-            
-            cursor.execute("SELECT MIN(observation_time) as oldest, MAX(observation_time) as newest FROM weather_records")
+        query = """
+        SELECT
+            COUNT(*) AS total,
+            COUNT(DISTINCT location_name) AS locations,
+            MIN(observation_time) AS oldest,
+            MAX(observation_time) AS newest
+        FROM weather_records;
+        """
+        
+        with self.get_read_cursor() as cursor:
+            cursor.execute(query)
             row = cursor.fetchone()
         
         return {
-            "total_records": total,
-            "unique_locations": locations,
+            "total_records": row["total"],
+            "unique_locations": row["locations"],
             "oldest_record": row["oldest"],
             "newest_record": row["newest"]
         }
     
     def close(self):
         """Close database connection."""
-        if self._connection:
-            self._connection.close()
-            self._connection = None
-            logger.info("Database connection closed")
+        with self._read_lock:
+            if self._read_connection:
+                self._read_connection.close()
+                self._read_connection = None
+        with self._lock:
+            if self._connection:
+                self._connection.close()
+                self._connection = None
+                logger.info("Database connection closed")
 
 
 if __name__ == "__main__":
     # Quick test
+    logging.basicConfig(level=logging.INFO)
     from src.scraper import fetch_weather_data
     
     db = WeatherDatabase("data/weather.db")
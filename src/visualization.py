@@ -1,15 +1,19 @@
 """Visualization module for temperature map using Folium."""
 
 import logging
+from bisect import bisect_right
+from functools import lru_cache
+from math import isfinite
 from typing import Optional
 
 import folium
-from folium.plugins import MarkerCluster
+import numpy as np
+from folium.plugins import FastMarkerCluster
+from folium.template import Template
+from folium.utilities import JsCode
 
 from .config import DEFAULT_MAP_CENTER, DEFAULT_MAP_ZOOM
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Temperature color ranges (Celsius)
@@ -22,7 +26,30 @@ TEMPERATURE_COLORS = [
     (30, float('inf'), '#FF0000', 'Very Hot (>30°C)')    # Red
 ]
 
+# Above this many records, statistics use NumPy reductions
+NUMPY_STATISTICS_THRESHOLD = 256
 
+# Above this many records, marker colors are binned in one vectorized call
+VECTORIZED_COLOR_THRESHOLD = 100
+
+# Above this many unclustered markers, skip folium's GeoJson machinery and
+# emit the marker rows straight into the page script
+DIRECT_JS_THRESHOLD = 2000
+
+# TEMPERATURE_COLORS split into parallel tuples; the bins are contiguous,
+# so each bin is fully described by its upper edge
+_BIN_UPPER = tuple(float(upper) for _, upper, _, _ in TEMPERATURE_COLORS)
+_BIN_COLOR = tuple(color for _, _, color, _ in TEMPERATURE_COLORS)
+_BIN_LABEL = tuple(label for _, _, _, label in TEMPERATURE_COLORS)
+
+# Lower edges of every bin but the first: bisect_right() over them returns
+# the bin index, with values on an edge falling in the upper bin
+_BIN_EDGES = _BIN_UPPER[:-1]
+
+
+# Readings come at 0.1°C resolution, so a few hundred distinct values cover
+# a whole map and repeated temperatures are answered from the cache
+@lru_cache(maxsize=512)
 def get_temperature_color(temperature: float) -> str:
     """Get color for a temperature value.
     
@@ -32,12 +59,12 @@ def get_temperature_color(temperature: float) -> str:
     Returns:
         Hex color string.
     """
-    for min_temp, max_temp, color, _ in TEMPERATURE_COLORS:
-        if min_temp <= temperature < max_temp:
-            return color
-    return '#808080'  # Gray as fallback
+    if not isfinite(temperature):
+        return '#808080'  # Gray as fallback
+    return _BIN_COLOR[bisect_right(_BIN_EDGES, temperature)]
 
 
+@lru_cache(maxsize=512)
 def get_temperature_label(temperature: float) -> str:
     """Get label for a temperature value.
     
@@ -47,10 +74,32 @@ def get_temperature_label(temperature: float) -> str:
     Returns:
         Temperature range label.
     """
-    for min_temp, max_temp, _, label in TEMPERATURE_COLORS:
-        if min_temp <= temperature < max_temp:
-            return label
-    return 'Unknown'
+    if not isfinite(temperature):
+        return 'Unknown'
+    return _BIN_LABEL[bisect_right(_BIN_EDGES, temperature)]
+
+
+# Bin edges and the colors they index into for np.digitize; the extra
+# trailing gray is used for NaN and infinite temperatures
+_BIN_EDGES_ARRAY = np.array(_BIN_EDGES, dtype=np.float64)
+_COLOR_ARRAY = np.array(_BIN_COLOR + ('#808080',))
+
+
+def get_temperature_colors(temperatures: list[Optional[float]]) -> list[str]:
+    """Get colors for many temperature values at once.
+    
+    Args:
+        temperatures: Temperatures in Celsius; None is treated like NaN.
+        
+    Returns:
+        Hex color strings, matching get_temperature_color element-wise.
+    """
+    temps = np.array(
+        [np.nan if t is None else t for t in temperatures], dtype=np.float64
+    )
+    idx = np.digitize(temps, _BIN_EDGES_ARRAY)
+    idx[~np.isfinite(temps)] = len(_COLOR_ARRAY) - 1
+    return _COLOR_ARRAY[idx].tolist()
 
 
 def create_folium_map(
@@ -88,46 +137,34 @@ def create_folium_map(
         control=True
     ).add_to(m)
     
-    # Create marker group or cluster
-    if use_clustering:
-        marker_group = MarkerCluster(name='Weather Stations')
+    # Only records with coordinates and a temperature get a marker
+    valid = [
+        r for r in data
+        if r.get('latitude') is not None
+        and r.get('longitude') is not None
+        and r.get('temperature') is not None
+    ]
+    
+    if len(valid) > VECTORIZED_COLOR_THRESHOLD:
+        colors = get_temperature_colors([r['temperature'] for r in valid])
     else:
-        marker_group = folium.FeatureGroup(name='Weather Stations')
+        colors = [get_temperature_color(r['temperature']) for r in valid]
     
-    # Add markers for each location
-    for record in data:
-        try:
-            lat = record.get('latitude')
-            lon = record.get('longitude')
-            temp = record.get('temperature')
-            name = record.get('location_name', 'Unknown')
-            
-            if lat is None or lon is None or temp is None:
-                continue
-            
-            color = get_temperature_color(temp)
-            
-            # Create popup content
-            popup_html = create_popup_html(record)
-            popup = folium.Popup(popup_html, max_width=300)
-            
-            # Create circle marker
-            folium.CircleMarker(
-                location=[lat, lon],
-                radius=10,
-                popup=popup,
-                tooltip=f"{name}: {temp}°C",
-                color=color,
-                fill=True,
-                fillColor=color,
-                fillOpacity=0.7,
-                weight=2
-            ).add_to(marker_group)
-            
-        except Exception as e:
-            logger.warning(f"Failed to add marker for {record.get('location_name')}: {e}")
-    
-    marker_group.add_to(m)
+    stations = _build_station_rows(valid, colors)
+    
+    if use_clustering:
+        # Rows are turned into markers and clustered entirely in the browser
+        FastMarkerCluster(
+            stations,
+            callback=_STATION_MARKER_CALLBACK,
+            name='Weather Stations'
+        ).add_to(m)
+    elif len(stations) > DIRECT_JS_THRESHOLD:
+        marker_group = folium.FeatureGroup(name='Weather Stations')
+        _StationMarkers(stations).add_to(marker_group)
+        marker_group.add_to(m)
+    else:
+        _create_station_layer(stations).add_to(m)
     
     # Add legend
     legend_html = get_legend_html()
@@ -139,80 +176,235 @@ def create_folium_map(
     return m
 
 
-def create_popup_html(record: dict) -> str:
-    """Create HTML content for marker popup.
+def _build_station_rows(records: list[dict], colors: list[str]) -> list[list]:
+    """Build [lat, lon, color, popup HTML, tooltip] rows for mappable records.
     
     Args:
-        record: Weather data dictionary.
+        records: Records that have coordinates and a temperature.
+        colors: Marker color for each record.
         
     Returns:
-        HTML string for popup.
+        One row per record.
     """
-    name = record.get('location_name', 'Unknown')
-    temp = record.get('temperature', 'N/A')
-    county = record.get('county_name', '')
-    town = record.get('town_name', '')
-    weather = record.get('weather_description', '')
-    humidity = record.get('humidity')
-    wind = record.get('wind_speed')
-    obs_time = record.get('observation_time', '')
+    stations = []
+    for record, color in zip(records, colors):
+        name = record.get('location_name', 'Unknown')
+        temp = record['temperature']
+        
+        # Create popup content
+        popup_html = _popup_html(
+            name=name,
+            temp=temp,
+            color=color,
+            county=record.get('county_name', ''),
+            town=record.get('town_name', ''),
+            weather=record.get('weather_description', ''),
+            humidity=record.get('humidity'),
+            wind=record.get('wind_speed'),
+            obs_time=record.get('observation_time', '')
+        )
+        stations.append(
+            [record['latitude'], record['longitude'], color, popup_html, f"{name}: {temp}°C"]
+        )
     
-    location_str = f"{county} {town}".strip() or 'Taiwan'
+    return stations
+
+
+# Colors each station feature and binds its prebuilt popup and tooltip
+# in the browser
+_BIND_STATION_DETAILS = JsCode("""
+function(feature, layer) {
+    layer.setStyle({color: feature.properties.color, fillColor: feature.properties.color});
+    layer.bindPopup(feature.properties.popup, {maxWidth: 300});
+    layer.bindTooltip(feature.properties.tooltip, {sticky: true});
+}
+""")
+
+
+# Builds one colored circle marker from a [lat, lon, color, popup, tooltip] row
+_STATION_MARKER_CALLBACK = """
+function(row) {
+    var marker = L.circleMarker(new L.LatLng(row[0], row[1]), {
+        radius: 10,
+        color: row[2],
+        fill: true,
+        fillColor: row[2],
+        fillOpacity: 0.7,
+        weight: 2
+    });
+    marker.bindPopup(row[3], {maxWidth: 300});
+    marker.bindTooltip(row[4], {sticky: true});
+    return marker;
+}
+"""
+
+
+def _create_station_layer(stations: list[list]) -> folium.GeoJson:
+    """Create one GeoJson layer holding a circle marker per station.
     
-    html = f"""
+    A single FeatureCollection serializes far less per-marker JavaScript
+    than one folium.CircleMarker element per station.
+    
+    Args:
+        stations: [lat, lon, color, popup HTML, tooltip] rows.
+        
+    Returns:
+        GeoJson layer named 'Weather Stations'.
+    """
+    features = [
+        {
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [lon, lat]},
+            "properties": {"color": color, "popup": popup_html, "tooltip": tooltip}
+        }
+        for lat, lon, color, popup_html, tooltip in stations
+    ]
+    return folium.GeoJson(
+        {"type": "FeatureCollection", "features": features},
+        name='Weather Stations',
+        marker=folium.CircleMarker(radius=10, fill=True, fill_opacity=0.7, weight=2),
+        on_each_feature=_BIND_STATION_DETAILS
+    )
+
+
+class _StationMarkers(folium.MacroElement):
+    """Circle markers created in the browser from one embedded row array.
+    
+    The rows are serialized with a single tojson call and a short loop adds
+    each marker to the parent layer, so Python does no per-marker work.
+    
+    Args:
+        stations: [lat, lon, color, popup HTML, tooltip] rows.
+    """
+    
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            (function() {
+                var rows = {{ this.stations|tojson }};
+                for (var i = 0; i < rows.length; i++) {
+                    var row = rows[i];
+                    L.circleMarker([row[0], row[1]], {
+                        radius: 10,
+                        color: row[2],
+                        fill: true,
+                        fillColor: row[2],
+                        fillOpacity: 0.7,
+                        weight: 2
+                    })
+                        .bindPopup(row[3], {maxWidth: 300})
+                        .bindTooltip(row[4], {sticky: true})
+                        .addTo({{ this._parent.get_name() }});
+                }
+            })();
+        {% endmacro %}
+    """)
+    
+    def __init__(self, stations: list[list]):
+        super().__init__()
+        self._name = 'StationMarkers'
+        self.stations = stations
+
+
+# Static popup markup, filled with %-formatting: the header takes name,
+# location, color and temperature; each optional line takes one value
+_POPUP_HEADER_TMPL = """
     <div style="font-family: Arial, sans-serif; min-width: 200px;">
-        <h4 style="margin: 0 0 10px 0; color: #333;">{name}</h4>
+        <h4 style="margin: 0 0 10px 0; color: #333;">%s</h4>
         <p style="margin: 5px 0; color: #666; font-size: 12px;">
-            📍 {location_str}
+            📍 %s
         </p>
         <hr style="margin: 10px 0; border: none; border-top: 1px solid #eee;">
         <p style="margin: 5px 0;">
-            <strong style="font-size: 24px; color: {get_temperature_color(temp)};">{temp}°C</strong>
+            <strong style="font-size: 24px; color: %s;">%s°C</strong>
         </p>
     """
+_POPUP_WEATHER_TMPL = '<p style="margin: 5px 0;">🌤️ %s</p>'
+_POPUP_HUMIDITY_TMPL = '<p style="margin: 5px 0;">💧 濕度: %s%%</p>'
+_POPUP_WIND_TMPL = '<p style="margin: 5px 0;">💨 風速: %s m/s</p>'
+_POPUP_TIME_TMPL = '<p style="margin: 10px 0 0 0; color: #999; font-size: 11px;">更新: %s</p>'
+_POPUP_FOOTER = "</div>"
+
+
+def create_popup_html(record: dict, color: Optional[str] = None) -> str:
+    """Create HTML content for marker popup.
+    
+    Kept as public API for callers building their own markers;
+    create_folium_map renders the same popup through ``_popup_html``.
+    
+    Args:
+        record: Weather data dictionary.
+        color: Precomputed temperature color; looked up when omitted.
+        
+    Returns:
+        HTML string for popup.
+    """
+    temp = record.get('temperature', 'N/A')
+    if color is None:
+        color = get_temperature_color(temp)
+    
+    return _popup_html(
+        name=record.get('location_name', 'Unknown'),
+        temp=temp,
+        color=color,
+        county=record.get('county_name', ''),
+        town=record.get('town_name', ''),
+        weather=record.get('weather_description', ''),
+        humidity=record.get('humidity'),
+        wind=record.get('wind_speed'),
+        obs_time=record.get('observation_time', '')
+    )
+
+
+def _popup_html(
+    name: str,
+    temp,
+    color: str,
+    county: str,
+    town: str,
+    weather: str,
+    humidity: Optional[float],
+    wind: Optional[float],
+    obs_time: str
+) -> str:
+    """Render popup HTML from already-extracted record fields."""
+    location_str = f"{county} {town}".strip() or 'Taiwan'
+    
+    parts = [_POPUP_HEADER_TMPL % (name, location_str, color, temp)]
     
     if weather:
-        html += f'<p style="margin: 5px 0;">🌤️ {weather}</p>'
+        parts.append(_POPUP_WEATHER_TMPL % weather)
     
     if humidity is not None:
-        html += f'<p style="margin: 5px 0;">💧 濕度: {humidity}%</p>'
+        parts.append(_POPUP_HUMIDITY_TMPL % humidity)
     
     if wind is not None:
-        html += f'<p style="margin: 5px 0;">💨 風速: {wind} m/s</p>'
+        parts.append(_POPUP_WIND_TMPL % wind)
     
     if obs_time:
         # Format time for display
         time_display = obs_time.replace('T', ' ').replace('+08:00', '')
-        html += f'<p style="margin: 10px 0 0 0; color: #999; font-size: 11px;">更新: {time_display}</p>'
+        parts.append(_POPUP_TIME_TMPL % time_display)
     
-    html += "</div>"
-    return html
+    parts.append(_POPUP_FOOTER)
+    return ''.join(parts)
 
 
-def get_legend_html() -> str:
-    """Get HTML for temperature color legend.
-    
-    Returns:
-        HTML string for legend overlay.
-    """
-    legend_items = ""
-    for min_temp, max_temp, color, label in TEMPERATURE_COLORS:
-        legend_items += f"""
+# Legend markup: one swatch row per TEMPERATURE_COLORS entry inside a fixed box
+_LEGEND_ITEM_TMPL = """
         <div style="display: flex; align-items: center; margin: 3px 0;">
             <span style="
-                background-color: {color};
+                background-color: %s;
                 width: 20px;
                 height: 20px;
                 display: inline-block;
                 margin-right: 8px;
-                border-radius: 50%;
+                border-radius: 50%%;
                 border: 1px solid #ccc;
             "></span>
-            <span style="font-size: 12px;">{label}</span>
+            <span style="font-size: 12px;">%s</span>
         </div>
         """
-    
-    legend_html = f"""
+_LEGEND_TMPL = """
     <div style="
         position: fixed;
         bottom: 50px;
@@ -225,10 +417,38 @@ def get_legend_html() -> str:
         font-family: Arial, sans-serif;
     ">
         <h4 style="margin: 0 0 10px 0; font-size: 14px; color: #333;">溫度圖例</h4>
-        {legend_items}
+        %s
     </div>
     """
-    return legend_html
+
+
+@lru_cache(maxsize=1)
+def get_legend_html() -> str:
+    """Get HTML for temperature color legend.
+    
+    TEMPERATURE_COLORS never changes at runtime, so the legend is built
+    once and reused for every map.
+    
+    Returns:
+        HTML string for legend overlay.
+    """
+    legend_items = ''.join(
+        _LEGEND_ITEM_TMPL % (color, label)
+        for color, label in zip(_BIN_COLOR, _BIN_LABEL)
+    )
+    return _LEGEND_TMPL % legend_items
+
+
+def _empty_statistics(count: int) -> dict:
+    """Get the statistics dictionary for data without temperatures."""
+    return {
+        "count": count,
+        "avg_temp": None,
+        "min_temp": None,
+        "max_temp": None,
+        "min_location": None,
+        "max_location": None
+    }
 
 
 def calculate_statistics(data: list[dict]) -> dict:
@@ -241,39 +461,66 @@ def calculate_statistics(data: list[dict]) -> dict:
         Dictionary with statistics.
     """
     if not data:
-        return {
-            "count": 0,
-            "avg_temp": None,
-            "min_temp": None,
-            "max_temp": None,
-            "min_location": None,
-            "max_location": None
-        }
+        return _empty_statistics(0)
     
-    temps = [(r.get('temperature'), r.get('location_name')) 
-             for r in data if r.get('temperature') is not None]
-    
-    if not temps:
-        return {
-            "count": len(data),
-            "avg_temp": None,
-            "min_temp": None,
-            "max_temp": None,
-            "min_location": None,
-            "max_location": None
-        }
+    if len(data) > NUMPY_STATISTICS_THRESHOLD:
+        return _calculate_statistics_numpy(data)
+    
+    # One pass for sum, min and max; locations are read only for the winners
+    n = 0
+    total = 0.0
+    min_temp = max_temp = None
+    min_record = max_record = None
+    for r in data:
+        t = r.get('temperature')
+        if t is None:
+            continue
+        n += 1
+        total += t
+        if min_temp is None or t < min_temp:
+            min_temp, min_record = t, r
+        if max_temp is None or t > max_temp:
+            max_temp, max_record = t, r
     
-    temp_values = [t[0] for t in temps]
-    min_temp, min_loc = min(temps, key=lambda x: x[0])
-    max_temp, max_loc = max(temps, key=lambda x: x[0])
+    if not n:
+        return _empty_statistics(len(data))
     
     return {
         "count": len(data),
-        "avg_temp": round(sum(temp_values) / len(temp_values), 1),
+        "avg_temp": round(total / n, 1),
         "min_temp": min_temp,
         "max_temp": max_temp,
-        "min_location": min_loc,
-        "max_location": max_loc
+        "min_location": min_record.get('location_name'),
+        "max_location": max_record.get('location_name')
+    }
+
+
+def _calculate_statistics_numpy(data: list[dict]) -> dict:
+    """Calculate statistics with NumPy reductions for large inputs.
+    
+    Args:
+        data: List of weather data dictionaries.
+        
+    Returns:
+        Dictionary with statistics, matching calculate_statistics.
+    """
+    valid = [r for r in data if r.get('temperature') is not None]
+    if not valid:
+        return _empty_statistics(len(data))
+    
+    temps = np.fromiter(
+        (r['temperature'] for r in valid), dtype=np.float64, count=len(valid)
+    )
+    min_record = valid[int(temps.argmin())]
+    max_record = valid[int(temps.argmax())]
+    
+    return {
+        "count": len(data),
+        "avg_temp": round(float(temps.mean()), 1),
+        "min_temp": min_record['temperature'],
+        "max_temp": max_record['temperature'],
+        "min_location": min_record.get('location_name'),
+        "max_location": max_record.get('location_name')
     }
 
 
@@ -0,0 +1,301 @@
+"""Tests for the CWA API client helpers in src.scraper."""
+
+import io
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+import requests
+import urllib3
+
+from src import scraper
+
+
+def make_response(body: bytes = b"", status: int = 200, headers: dict = None,
+                  content_length: int = None) -> requests.Response:
+    """Build a streamed requests.Response over an in-memory body.
+    
+    Args:
+        body: Bytes the server sends.
+        status: HTTP status code.
+        headers: Extra response headers.
+        content_length: Advertised length; defaults to len(body).
+    
+    Returns:
+        Response whose body is read through urllib3 like a real one.
+    """
+    headers = dict(headers or {})
+    headers.setdefault("Content-Length", str(len(body) if content_length is None else content_length))
+    response = requests.Response()
+    response.status_code = status
+    response.headers = requests.structures.CaseInsensitiveDict(headers)
+    response.raw = urllib3.HTTPResponse(
+        io.BytesIO(body),
+        headers=headers,
+        status=status,
+        preload_content=False,
+        enforce_content_length=True
+    )
+    response.url = "https://example.test/api"
+    return response
+
+
+def station_body(count: int = 3, success: str = "true") -> bytes:
+    """Build an O-A0003-001 style body with ``count`` stations."""
+    stations = [
+        {
+            "StationName": f"S{i}",
+            "GeoInfo": {
+                "Coordinates": [
+                    {"CoordinateName": "WGS84", "StationLatitude": "23.5", "StationLongitude": "121.0"}
+                ],
+                "CountyName": "臺北市",
+                "TownName": "中正區"
+            },
+            "WeatherElement": {"AirTemperature": str(20 + i), "Weather": "晴"},
+            "ObsTime": {"DateTime": "2026-10-15T12:00:00+08:00"}
+        }
+        for i in range(count)
+    ]
+    return json.dumps(
+        {"success": success, "records": {"Station": stations}}, ensure_ascii=False
+    ).encode()
+
+
+class FakeSession:
+    """Stand-in for the shared requests Session that replays queued responses."""
+    
+    def __init__(self, get=(), head=()):
+        self.get_responses = list(get)
+        self.head_responses = list(head)
+        self.calls = []
+    
+    def get(self, url, headers=None, **kwargs):
+        self.calls.append(("GET", dict(headers or {})))
+        return self.get_responses.pop(0)
+    
+    def head(self, url, **kwargs):
+        self.calls.append(("HEAD", {}))
+        response = self.head_responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+@pytest.fixture
+def api(monkeypatch):
+    """Isolate the module cache and stub the API key and backoff sleeps."""
+    monkeypatch.setattr(scraper, "_RESPONSE_CACHE", {})
+    monkeypatch.setattr(scraper, "get_cwa_api_key", lambda: "test-key")
+    monkeypatch.setattr(scraper.time, "sleep", lambda seconds: None)
+    
+    def install(session: FakeSession) -> FakeSession:
+        monkeypatch.setattr(scraper, "_SESSION", session)
+        return session
+    
+    return install
+
+
+class TestRetryAfterSeconds:
+    """Tests for _retry_after_seconds."""
+    
+    def test_delay_seconds(self):
+        response = make_response(status=429, headers={"Retry-After": "7"})
+        assert scraper._retry_after_seconds(response) == 7.0
+    
+    def test_http_date(self):
+        retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+        response = make_response(status=503, headers={"Retry-After": format_datetime(retry_at, usegmt=True)})
+        assert 25 <= scraper._retry_after_seconds(response) <= 30
+    
+    def test_past_date_is_zero(self):
+        response = make_response(status=503, headers={"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"})
+        assert scraper._retry_after_seconds(response) == 0.0
+    
+    def test_negative_seconds_is_zero(self):
+        response = make_response(status=429, headers={"Retry-After": "-5"})
+        assert scraper._retry_after_seconds(response) == 0.0
+    
+    @pytest.mark.parametrize("value", ["soon", "", "Mon, 99 Foo 2026"])
+    def test_junk_is_ignored(self, value):
+        response = make_response(status=429, headers={"Retry-After": value})
+        assert scraper._retry_after_seconds(response) is None
+    
+    def test_only_rate_limit_statuses(self):
+        response = make_response(status=500, headers={"Retry-After": "7"})
+        assert scraper._retry_after_seconds(response) is None
+        assert scraper._retry_after_seconds(None) is None
+
+
+class TestIterResponseItems:
+    """Tests for _iter_response_items."""
+    
+    def test_streams_items(self):
+        response = make_response(station_body(3))
+        items = list(scraper._iter_response_items(response, scraper.STATION_ITEMS_PREFIX))
+        assert [item["StationName"] for item in items] == ["S0", "S1", "S2"]
+    
+    def test_streams_across_chunks(self, monkeypatch):
+        monkeypatch.setattr(scraper, "RESPONSE_CHUNK_SIZE", 64)
+        response = make_response(station_body(20))
+        items = list(scraper._iter_response_items(response, scraper.STATION_ITEMS_PREFIX))
+        assert len(items) == 20
+        assert isinstance(items[0]["GeoInfo"]["Coordinates"], list)
+    
+    def test_unsuccessful_response(self):
+        response = make_response(station_body(success="false"))
+        with pytest.raises(ValueError, match="unsuccessful"):
+            list(scraper._iter_response_items(response, scraper.STATION_ITEMS_PREFIX))
+    
+    def test_missing_success_flag(self):
+        response = make_response(b'{"records": {"Station": []}}')
+        with pytest.raises(ValueError, match="no success flag"):
+            list(scraper._iter_response_items(response, scraper.STATION_ITEMS_PREFIX))
+    
+    def test_success_flag_after_records(self):
+        body = b'{"records": {"Station": [{"StationName": "S0"}]}, "success": "true"}'
+        items = list(scraper._iter_response_items(make_response(body), scraper.STATION_ITEMS_PREFIX))
+        assert [item["StationName"] for item in items] == ["S0"]
+    
+    def test_late_unsuccessful_flag(self):
+        body = b'{"records": {"Station": []}, "success": "false"}'
+        with pytest.raises(ValueError, match="unsuccessful"):
+            list(scraper._iter_response_items(make_response(body), scraper.STATION_ITEMS_PREFIX))
+    
+    def test_success_flag_split_across_chunks(self, monkeypatch):
+        monkeypatch.setattr(scraper, "RESPONSE_CHUNK_SIZE", 8)
+        items = list(scraper._iter_response_items(make_response(station_body(3)), scraper.STATION_ITEMS_PREFIX))
+        assert len(items) == 3
+    
+    def test_empty_body(self):
+        with pytest.raises(requests.exceptions.InvalidJSONError):
+            list(scraper._iter_response_items(make_response(b""), scraper.STATION_ITEMS_PREFIX))
+    
+    def test_truncated_body(self):
+        body = station_body(20)
+        response = make_response(body[:len(body) // 2], content_length=len(body))
+        with pytest.raises(requests.exceptions.ChunkedEncodingError):
+            list(scraper._iter_response_items(response, scraper.STATION_ITEMS_PREFIX))
+    
+    def test_malformed_json(self):
+        body = station_body(20)
+        response = make_response(body[:len(body) // 2])
+        with pytest.raises(requests.RequestException):
+            list(scraper._iter_response_items(response, scraper.STATION_ITEMS_PREFIX))
+    
+    def test_whole_body_fallback(self, monkeypatch):
+        monkeypatch.setattr(scraper, "ijson", None)
+        response = make_response(station_body(3))
+        items = list(scraper._iter_response_items(response, scraper.STATION_ITEMS_PREFIX))
+        assert len(items) == 3
+    
+    @pytest.mark.parametrize("use_orjson", [True, False])
+    def test_whole_body_malformed_json(self, monkeypatch, use_orjson):
+        monkeypatch.setattr(scraper, "ijson", None)
+        if not use_orjson:
+            monkeypatch.setattr(scraper, "orjson", None)
+        elif scraper.orjson is None:
+            pytest.skip("orjson is not installed")
+        body = station_body(20)
+        with pytest.raises(requests.exceptions.InvalidJSONError):
+            list(scraper._iter_response_items(make_response(body[:len(body) // 2]), scraper.STATION_ITEMS_PREFIX))
+
+
+class TestFetchWeatherData:
+    """Tests for fetch_weather_data retries and response caching."""
+    
+    def test_truncated_body_is_retried(self, api):
+        body = station_body(20)
+        session = api(FakeSession(get=[
+            make_response(body[:100], content_length=len(body)) for _ in range(3)
+        ]))
+        with pytest.raises(requests.exceptions.ChunkedEncodingError):
+            scraper.fetch_weather_data(max_retries=3)
+        assert len(session.calls) == 3
+    
+    def test_empty_body_is_retried(self, api):
+        session = api(FakeSession(get=[make_response(b""), make_response(station_body(2))]))
+        assert len(scraper.fetch_weather_data(max_retries=2)) == 2
+        assert len(session.calls) == 2
+    
+    def test_fresh_cache_skips_request(self, api):
+        session = api(FakeSession(get=[make_response(station_body(2))]))
+        first = scraper.fetch_weather_data()
+        assert scraper.fetch_weather_data() is first
+        assert len(session.calls) == 1
+    
+    def test_max_age_sets_ttl(self, api):
+        api(FakeSession(get=[make_response(station_body(2), headers={"Cache-Control": "max-age=42"})]))
+        scraper.fetch_weather_data()
+        cached = scraper._RESPONSE_CACHE[scraper.STATION_OBSERVATION_ENDPOINT]
+        assert 40 < cached.expires_at - time.monotonic() <= 42
+    
+    def test_not_modified_reuses_cache(self, api):
+        session = api(FakeSession(get=[
+            make_response(station_body(2), headers={"ETag": '"v1"'}),
+            make_response(status=304, headers={"ETag": '"v1"'})
+        ]))
+        first = scraper.fetch_weather_data()
+        scraper.expire_response_cache()
+        assert scraper.fetch_weather_data() is first
+        assert session.calls[1] == ("GET", {"If-None-Match": '"v1"'})
+    
+    def test_forced_refresh_skips_head_probe(self, api):
+        session = api(FakeSession(get=[
+            make_response(station_body(2), headers={"ETag": '"v1"'}),
+            make_response(station_body(3), headers={"ETag": '"v2"'})
+        ]))
+        scraper.fetch_weather_data()
+        scraper.expire_response_cache()
+        assert len(scraper.fetch_weather_data()) == 3
+        assert [method for method, _ in session.calls] == ["GET", "GET"]
+
+
+class TestHeadProbe:
+    """Tests for the HEAD freshness probe of recently expired cache entries."""
+    
+    @pytest.fixture
+    def expired(self, api):
+        """Cache one response, then expire it within the probe window."""
+        session = api(FakeSession(get=[make_response(
+            station_body(2), headers={"ETag": '"v1"', "Last-Modified": "Thu, 15 Oct 2026 04:00:00 GMT"}
+        )]))
+        parsed = scraper.fetch_weather_data()
+        cached = scraper._RESPONSE_CACHE[scraper.STATION_OBSERVATION_ENDPOINT]
+        cached.expires_at = time.monotonic() - 1
+        return session, parsed
+    
+    def test_matching_validators_reuse_cache(self, expired):
+        session, parsed = expired
+        session.head_responses.append(make_response(
+            headers={"ETag": '"v1"', "Last-Modified": "Thu, 15 Oct 2026 04:00:00 GMT"}
+        ))
+        assert scraper.fetch_weather_data() is parsed
+        assert [method for method, _ in session.calls] == ["GET", "HEAD"]
+        assert scraper._get_fresh_cached(scraper.STATION_OBSERVATION_ENDPOINT) is parsed
+    
+    def test_changed_etag_falls_back_to_get(self, expired):
+        session, parsed = expired
+        session.head_responses.append(make_response(headers={"ETag": '"v2"'}))
+        session.get_responses.append(make_response(station_body(3), headers={"ETag": '"v2"'}))
+        assert len(scraper.fetch_weather_data()) == 3
+        assert [method for method, _ in session.calls] == ["GET", "HEAD", "GET"]
+    
+    def test_failed_probe_falls_back_to_get(self, expired):
+        session, parsed = expired
+        session.head_responses.append(requests.ConnectionError("refused"))
+        session.get_responses.append(make_response(status=304))
+        assert scraper.fetch_weather_data() is parsed
+        assert [method for method, _ in session.calls] == ["GET", "HEAD", "GET"]
+    
+    def test_long_expired_entry_is_not_probed(self, expired):
+        session, parsed = expired
+        cached = scraper._RESPONSE_CACHE[scraper.STATION_OBSERVATION_ENDPOINT]
+        # A long TTL must not widen the probe window
+        cached.ttl = 10 * scraper.HEAD_PROBE_WINDOW
+        cached.expires_at = time.monotonic() - scraper.HEAD_PROBE_WINDOW - 1
+        session.get_responses.append(make_response(status=304))
+        assert scraper.fetch_weather_data() is parsed
+        assert [method for method, _ in session.calls] == ["GET", "GET"]
@@ -0,0 +1,54 @@
+"""Tests for the SQLite weather store in src.storage."""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from src import storage
+from src.storage import WeatherDatabase
+
+
+def make_record(name: str, observed: datetime, temperature: float = 20.0) -> dict:
+    """Build a weather record observed at the given time."""
+    return {
+        "location_name": name,
+        "latitude": 25.0,
+        "longitude": 121.5,
+        "temperature": temperature,
+        "unit": "C",
+        "observation_time": observed.isoformat(timespec="seconds"),
+        "county_name": "臺北市",
+        "town_name": "中正區",
+        "weather_description": "晴",
+        "humidity": 70.0,
+        "wind_speed": None
+    }
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Open a database in a temporary directory."""
+    database = WeatherDatabase(str(tmp_path / "weather.db"))
+    yield database
+    database.close()
+
+
+class TestCleanupOldData:
+    """Tests for the chunked cleanup_old_data."""
+    
+    @pytest.mark.parametrize("old_count", [0, 3, 7, 9])
+    def test_deletes_only_old_records(self, db, monkeypatch, old_count):
+        monkeypatch.setattr(storage, "CLEANUP_BATCH_SIZE", 3)
+        now = datetime.now()
+        old = [make_record(f"old{i}", now - timedelta(days=40, hours=i)) for i in range(old_count)]
+        recent = [make_record(f"new{i}", now - timedelta(days=1, hours=i)) for i in range(2)]
+        db.save_weather_data(old + recent)
+        
+        assert db.cleanup_old_data(days=30) == old_count
+        remaining = {r["location_name"] for r in db.get_latest_data()}
+        assert remaining == {"new0", "new1"}
+    
+    def test_nothing_to_delete(self, db):
+        db.save_weather_data([make_record("new", datetime.now())])
+        assert db.cleanup_old_data(days=30) == 0
+        assert db.get_statistics()["total_records"] == 1
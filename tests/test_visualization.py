@@ -0,0 +1,162 @@
+"""Tests for the temperature map helpers in src.visualization."""
+
+import math
+
+import pytest
+
+from src import visualization
+from src.visualization import (
+    calculate_statistics,
+    create_folium_map,
+    get_temperature_color,
+    get_temperature_colors,
+    get_temperature_label
+)
+
+BLUE, CYAN, GREEN, YELLOW, ORANGE, RED, GRAY = (
+    '#0000FF', '#00FFFF', '#00FF00', '#FFFF00', '#FFA500', '#FF0000', '#808080'
+)
+
+# (temperature, color, label) on and around every bin edge
+BIN_CASES = [
+    (-40.0, BLUE, 'Cold (<10°C)'),
+    (9.9, BLUE, 'Cold (<10°C)'),
+    (10, CYAN, 'Cool (10-15°C)'),
+    (14.99, CYAN, 'Cool (10-15°C)'),
+    (15, GREEN, 'Mild (15-20°C)'),
+    (19.9, GREEN, 'Mild (15-20°C)'),
+    (20, YELLOW, 'Warm (20-25°C)'),
+    (24.9, YELLOW, 'Warm (20-25°C)'),
+    (25, ORANGE, 'Hot (25-30°C)'),
+    (29.99, ORANGE, 'Hot (25-30°C)'),
+    (30, RED, 'Very Hot (>30°C)'),
+    (45.5, RED, 'Very Hot (>30°C)'),
+]
+
+SCRIPT_BREAKOUT = '</script><script>alert(1)</script>'
+
+
+def make_record(name: str, temperature, lat: float = 25.0, lon: float = 121.5) -> dict:
+    """Build a mappable weather record."""
+    return {
+        'location_name': name,
+        'latitude': lat,
+        'longitude': lon,
+        'temperature': temperature,
+        'unit': 'C',
+        'observation_time': '2026-10-15T12:00:00+08:00',
+        'county_name': '臺北市',
+        'town_name': '中正區',
+        'weather_description': '晴',
+        'humidity': 70.0,
+        'wind_speed': 2.5
+    }
+
+
+def make_records(count: int) -> list[dict]:
+    """Build ``count`` records spread over Taiwan and every color bin."""
+    return [
+        make_record(f"S{i}", 5 + (i % 300) / 10 * 3, 22 + (i % 30) / 10, 120 + (i % 20) / 10)
+        for i in range(count)
+    ]
+
+
+class TestTemperatureLookup:
+    """Tests for get_temperature_color and get_temperature_label."""
+    
+    @pytest.mark.parametrize("temperature,color,label", BIN_CASES)
+    def test_bin_edges(self, temperature, color, label):
+        assert get_temperature_color(temperature) == color
+        assert get_temperature_label(temperature) == label
+    
+    @pytest.mark.parametrize("temperature", [math.nan, math.inf])
+    def test_non_finite_is_unknown(self, temperature):
+        assert get_temperature_color(temperature) == GRAY
+        assert get_temperature_label(temperature) == 'Unknown'
+    
+    def test_negative_infinity_is_unknown(self):
+        # Behavior change: the original bin scan put -inf in the coldest bin
+        assert get_temperature_color(-math.inf) == GRAY
+        assert get_temperature_label(-math.inf) == 'Unknown'
+    
+    def test_none_is_rejected(self):
+        with pytest.raises(TypeError):
+            get_temperature_color(None)
+        with pytest.raises(TypeError):
+            get_temperature_label(None)
+
+
+class TestTemperatureColors:
+    """Tests for the batch get_temperature_colors."""
+    
+    def test_matches_scalar_lookup(self):
+        temps = [t for t, _, _ in BIN_CASES] + [x / 10 for x in range(-100, 450)]
+        temps += [math.nan, math.inf, -math.inf]
+        expected = [get_temperature_color(t) for t in temps]
+        expected[-1] = GRAY
+        assert get_temperature_colors(temps) == expected
+    
+    def test_none_is_unknown(self):
+        assert get_temperature_colors([None, 12.0]) == [GRAY, CYAN]
+
+
+class TestStatistics:
+    """Tests for calculate_statistics and its NumPy path."""
+    
+    def test_numpy_path_matches_pure_python(self, monkeypatch):
+        data = make_records(600)
+        # Ties: the first record holding the min/max must win on both paths
+        data[10]['temperature'] = data[400]['temperature'] = -30.0
+        data[20]['temperature'] = data[500]['temperature'] = 120.0
+        data[30]['temperature'] = data[40]['temperature'] = None
+        assert len(data) > visualization.NUMPY_STATISTICS_THRESHOLD
+        
+        vectorized = calculate_statistics(data)
+        monkeypatch.setattr(visualization, "NUMPY_STATISTICS_THRESHOLD", len(data))
+        assert calculate_statistics(data) == vectorized
+        assert vectorized['min_location'] == 'S10'
+        assert vectorized['max_location'] == 'S20'
+        assert vectorized['count'] == 600
+    
+    def test_without_temperatures(self):
+        data = [make_record(f"S{i}", None) for i in range(300)]
+        stats = calculate_statistics(data)
+        assert stats['count'] == 300
+        assert stats['avg_temp'] is None
+
+
+class TestCreateFoliumMap:
+    """Tests for the marker layers of create_folium_map."""
+    
+    def render(self, data: list[dict], **kwargs) -> str:
+        return create_folium_map(data, **kwargs).get_root().render()
+    
+    def test_geojson_layer(self):
+        html = self.render(make_records(30) + [make_record('No coords', 20.0, lat=None)])
+        assert 'L.geoJson(' in html
+        assert html.count('"type": "Feature"') == 30
+        assert 'No coords' not in html
+    
+    def test_geojson_escapes_script_end(self):
+        html = self.render([make_record(SCRIPT_BREAKOUT, 20.0)])
+        assert SCRIPT_BREAKOUT not in html
+    
+    def test_geojson_writes_each_popup_once(self):
+        html = self.render(make_records(30))
+        assert html.count('70.0%') == 30
+    
+    def test_marker_cluster(self):
+        html = self.render(make_records(30), use_clustering=True)
+        assert 'L.markerClusterGroup' in html
+        assert 'L.geoJson(' not in html
+    
+    def test_marker_cluster_escapes_script_end(self):
+        html = self.render([make_record(SCRIPT_BREAKOUT, 20.0)], use_clustering=True)
+        assert SCRIPT_BREAKOUT not in html
+    
+    def test_direct_js_rows(self, monkeypatch):
+        monkeypatch.setattr(visualization, "DIRECT_JS_THRESHOLD", 10)
+        html = self.render(make_records(30) + [make_record(SCRIPT_BREAKOUT, 20.0)])
+        assert 'var rows = ' in html
+        assert 'L.geoJson(' not in html
+        assert SCRIPT_BREAKOUT not in html